@@ -0,0 +1,282 @@
+import json
+import os
+import random
+import subprocess
+import sys
+import time
+import tracemalloc
+
+os.environ["SDL_VIDEODRIVER"] = "dummy"
+os.environ["SDL_AUDIODRIVER"] = "dummy"
+
+import numpy as np
+import pygame
+
+import game
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+DEFAULT_TICKS = 1200
+DEFAULT_SEED = 1
+
+def generate_level(cols, rows, seed):
+    rng = random.Random(seed)
+    grid = [[" "] * cols for _ in range(rows)]
+    for row in range(1, rows, 2):
+        col = rng.randint(0, 8)
+        while col < cols:
+            length = rng.randint(3, 14)
+            for c in range(col, min(col + length, cols)):
+                grid[row][c] = "*"
+            col += length + rng.randint(3, 12)
+    grid[0][2] = "$"
+    return ["".join(row) for row in grid]
+
+def spawn_ground_enemies(count):
+    groups = {}
+    for plat in game.platforms:
+        groups.setdefault(game.platform_grid.group_of(plat), []).append(plat)
+    group_platforms = [groups[key] for key in sorted(groups)]
+
+    for i in range(count):
+        plats = group_platforms[i % len(group_platforms)]
+        plat = plats[(i // len(group_platforms)) % len(plats)]
+        enemy = game.GroundEnemy(plat.centerx, plat.top - 80, plat)
+        game.enemy_spawner.ground_enemies.append(enemy)
+
+def spawn_crowd(count):
+    spawn_ground_enemies(count)
+    for enemy in game.enemy_spawner.ground_enemies:
+        enemy.health = enemy.max_health = 10 ** 9
+
+def spawn_flying_enemies(count):
+    game.enemy_spawner.max_flying_enemies = count
+    for _ in range(count):
+        x = random.randint(100, game.SCREEN_WIDTH * 2 - 100)
+        y = random.randint(100, game.SCREEN_HEIGHT - 200)
+        game.enemy_spawner.flying_enemies.append(game.FlyingEnemy(x, y))
+
+class SustainedFire:
+    def __init__(self, shots_per_second):
+        self.rate = shots_per_second / game.FPS
+        self.pending = 0.0
+
+    def __call__(self):
+        self.pending += self.rate
+        while self.pending >= 1.0:
+            self.pending -= 1.0
+            player = game.player
+            angle = random.uniform(0, 2 * np.pi)
+            game.weapon_system.shoot(player.rect.centerx, player.rect.centery, angle, 1)
+
+class BulletFlood:
+    def __init__(self, target):
+        self.target = target
+
+    def __call__(self):
+        player = game.player
+        while game.bullet_pool.count < self.target:
+            angle = random.uniform(0, 2 * np.pi)
+            game.weapon_system.shoot(player.rect.centerx, player.rect.centery, angle, 1)
+
+class ParticleFlood:
+    def __init__(self, target):
+        self.target = target
+
+    def __call__(self):
+        missing = self.target - game.effect_manager.count
+        if missing > 0:
+            player = game.player
+            game.effect_manager.add_effect(player.rect.centerx, player.rect.centery, 'bullet_impact', count=missing)
+
+class HoverSweep:
+    def __init__(self, hold=10, invalidate_every=60):
+        self.hold = hold
+        self.invalidate_every = invalidate_every
+        self.tick = 0
+
+    def __call__(self):
+        rects = game.hover_rects()
+        step = self.tick // self.hold
+        if rects and step % 2 == 0:
+            game.mouse_x, game.mouse_y = rects[step // 2 % len(rects)].center
+        else:
+            game.mouse_x, game.mouse_y = 0, 0
+        if self.tick % self.invalidate_every == 0:
+            game.static_screen.invalidate()
+        self.tick += 1
+
+def open_menu():
+    game.menu_manager.menu_open = True
+
+def kill_player():
+    game.player.alive = False
+
+SCENARIOS = {
+    'baseline': {},
+    'ground_enemies': {'setup': lambda: spawn_ground_enemies(200)},
+    'flying_enemies': {'setup': lambda: spawn_flying_enemies(50)},
+    'shotgun_fire': {'per_tick': lambda: SustainedFire(30)},
+    'crowd_fire': {'setup': lambda: spawn_crowd(200), 'per_tick': lambda: BulletFlood(300)},
+    'particles_10k': {'per_tick': lambda: ParticleFlood(10000)},
+    'large_map': {'level': lambda seed: generate_level(400, 60, seed)},
+    'menu_screen': {'setup': open_menu, 'per_tick': HoverSweep, 'screen': True},
+    'death_screen': {'setup': kill_player, 'per_tick': HoverSweep, 'screen': True}
+}
+
+class CountingSurface(pygame.Surface):
+    created = 0
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        CountingSurface.created += 1
+
+def peak_rss_mb():
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    if sys.platform == "darwin":
+        peak /= 1024
+    return round(peak / 1024, 1)
+
+def run_scenario(name, ticks, seed, draw, allocations=False):
+    scenario = SCENARIOS[name]
+    if 'level' in scenario:
+        game.level_map = scenario['level'](seed)
+
+    game.init_display()
+    synthetic_input = game.start_headless(seed)
+    if 'setup' in scenario:
+        scenario['setup']()
+        game.enemy_spawner.reindex()
+    per_tick = scenario['per_tick']() if 'per_tick' in scenario else None
+    screen_only = scenario.get('screen', False)
+
+    if allocations:
+        pygame.Surface = CountingSurface
+        tracemalloc.start()
+        heap_start = tracemalloc.get_traced_memory()[0]
+
+    times = np.zeros(ticks)
+    composed = np.zeros(ticks, dtype=bool)
+    for tick in range(ticks):
+        start = time.perf_counter()
+
+        if screen_only:
+            per_tick()
+            composed[tick] = game.static_screen.key is None or game.static_screen.key != game.static_screen_key()
+            game.effect_manager.update()
+            game.present_frame(game.camera_x, game.camera_y)
+        else:
+            game.player.is_invulnerable = True
+            game.player.dash_invul_duration = game.FPS
+            if per_tick:
+                per_tick()
+            game.headless_tick(synthetic_input)
+            if draw:
+                game.draw_headless_frame()
+
+        times[tick] = time.perf_counter() - start
+        if tick % 1000 == 0:
+            pygame.event.pump()
+
+    times *= 1000
+    result = {
+        'scenario': name,
+        'ticks': ticks,
+        'seed': seed,
+        'draw': draw,
+        'mean_ms': round(float(times.mean()), 4),
+        'p99_ms': round(float(np.percentile(times, 99)), 4),
+        'max_ms': round(float(times.max()), 4),
+        'peak_rss_mb': peak_rss_mb(),
+        'bullets': game.bullet_pool.count,
+        'particles': int(game.effect_manager.count),
+        'enemies': len(game.enemy_spawner.ground_enemies) + len(game.enemy_spawner.flying_enemies)
+    }
+    if screen_only:
+        compose, hover = times[composed], times[~composed]
+        result['compose_ticks'] = int(composed.sum())
+        result['compose_mean_ms'] = round(float(compose.mean()), 4) if len(compose) else None
+        result['hover_mean_ms'] = round(float(hover.mean()), 4) if len(hover) else None
+        result['hover_p99_ms'] = round(float(np.percentile(hover, 99)), 4) if len(hover) else None
+    if allocations:
+        heap_end, heap_peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        result['surfaces_per_tick'] = round(CountingSurface.created / ticks, 3)
+        result['heap_growth_kb'] = round((heap_end - heap_start) / 1024, 1)
+        result['heap_peak_kb'] = round((heap_peak - heap_start) / 1024, 1)
+    return result
+
+def run_isolated(name, ticks, seed, draw, allocations=False):
+    command = [sys.executable, os.path.abspath(__file__), "--run", name, "--ticks", str(ticks), "--seed", str(seed)]
+    if not draw:
+        command.append("--no-draw")
+    if allocations:
+        command.append("--allocations")
+    output = subprocess.run(command, capture_output=True, text=True, check=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+def compare(results, baseline):
+    previous = {entry['scenario']: entry for entry in baseline['scenarios']}
+    print(f"{'сценарий':<16}{'сред, мс':>12}{'было':>10}{'p99, мс':>12}{'было':>10}{'изм.':>9}")
+    for entry in results:
+        old = previous.get(entry['scenario'])
+        if old is None:
+            continue
+        change = (entry['mean_ms'] / old['mean_ms'] - 1) * 100 if old['mean_ms'] else 0.0
+        print(f"{entry['scenario']:<16}{entry['mean_ms']:12.3f}{old['mean_ms']:10.3f}"
+              f"{entry['p99_ms']:12.3f}{old['p99_ms']:10.3f}{change:+8.1f}%")
+
+def main(argv=None):
+    args = sys.argv[1:] if argv is None else argv
+    ticks = int(game.arg_value(args, "--ticks", DEFAULT_TICKS))
+    seed = int(game.arg_value(args, "--seed", DEFAULT_SEED))
+    draw = "--no-draw" not in args
+    allocations = "--allocations" in args
+
+    single = game.arg_value(args, "--run", None)
+    if single:
+        print(json.dumps(run_scenario(single, ticks, seed, draw, allocations)))
+        return
+
+    selected = game.arg_value(args, "--scenarios", None)
+    names = selected.split(",") if selected else list(SCENARIOS)
+
+    results = []
+    for name in names:
+        result = run_isolated(name, ticks, seed, draw, allocations)
+        print(f"{name:<16} сред {result['mean_ms']:8.3f} мс  p99 {result['p99_ms']:8.3f} мс  "
+              f"макс {result['max_ms']:8.3f} мс  RSS {result['peak_rss_mb']} МБ", file=sys.stderr)
+        if 'compose_ticks' in result:
+            print(f"{'':<16} компоновка {result['compose_mean_ms']} мс x{result['compose_ticks']}  "
+                  f"наведение {result['hover_mean_ms']} мс  p99 {result['hover_p99_ms']} мс", file=sys.stderr)
+        if allocations:
+            print(f"{'':<16} поверхностей/тик {result['surfaces_per_tick']}  "
+                  f"прирост кучи {result['heap_growth_kb']} КБ  пик {result['heap_peak_kb']} КБ", file=sys.stderr)
+        results.append(result)
+
+    report = {
+        'python': sys.version.split()[0],
+        'pygame': pygame.version.ver,
+        'numpy': np.__version__,
+        'scenarios': results
+    }
+
+    out = game.arg_value(args, "--out", None)
+    if out:
+        with open(out, "w") as f:
+            json.dump(report, f, indent=2)
+    else:
+        print(json.dumps(report, indent=2))
+
+    baseline = game.arg_value(args, "--baseline", None)
+    if baseline:
+        with open(baseline) as f:
+            compare(results, json.load(f))
+
+if __name__ == "__main__":
+    main()
@@ -1,12 +1,24 @@
 import pygame
+import numpy as np
 import math
 import random
 import os
+import csv
+import mmap
+import queue
+import struct
+import sys
+import threading
+import time
+import zlib
+from collections import OrderedDict
 
-pygame.init()
+PROCESS_START = time.perf_counter()
 
 SCREEN_WIDTH, SCREEN_HEIGHT = 1920, 1080
 FPS = 60
+SIM_STEP = 1.0 / FPS
+MAX_SIM_STEPS = 5
 WHITE = (255, 255, 255)
 RED = (255, 0, 0)
 GREEN = (0, 255, 0)
@@ -18,6 +30,13 @@ BG_COLOR = (66, 73, 69)
 MAX_SPEED, BOOST_SPEED = 7.0, 12.0
 GRAVITY = 1.0
 BLOCK_SIZE = 80
+CHUNK_SIZE = 1024
+CHUNK_CACHE_SIZE = 24
+CHUNK_BAKE_BUDGET = 1
+ENEMY_CELL_SIZE = 160
+ENEMY_CELL_KEY = 1 << 20
+SHOTGUN_BULLET_SIZE, RIFLE_BULLET_SIZE = (18, 6), (12, 4)
+BULLET_ANGLE_STEPS = 128
 
 level_map = [
     "* $                                      ***********                         ",
@@ -49,43 +68,184 @@ PARTICLE_COLORS = {
     'blood': [(200, 0, 0), (180, 0, 0), (160, 0, 0), (140, 0, 0)]
 }
 
-screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
-pygame.display.set_caption("Кубаноид")
-clock = pygame.time.Clock()
+screen = None
+clock = None
+font = None
 
-font = pygame.font.Font(None, 36)
+SOUND_FILES = {
+    'shotgun': "shoot_shotgun.mp3",
+    'rifle': "shoot_rifle.mp3",
+    'running': "running.wav",
+    'walking': "running.wav",
+    'jump': "jump.wav",
+    'dash': "dash.wav",
+    'reload': "rearmed.mp3",
+    'button': "menu_button.mp3"
+}
+
+class StartupProfiler:
+    def __init__(self, start=PROCESS_START):
+        self.enabled = False
+        self.start = start
+        self.last = start
+        self.phases = []
+        self.reported = False
+        
+    def mark(self, phase):
+        now = time.perf_counter()
+        self.phases.append((phase, now - self.last))
+        self.last = now
+        
+    def report(self):
+        if self.reported:
+            return
+        self.reported = True
+        if not self.enabled:
+            return
+        
+        print("Профиль запуска:")
+        for phase, elapsed in self.phases:
+            print(f"  {phase:<24} {elapsed * 1000:8.1f} мс")
+        print(f"  {'до первого кадра':<24} {(self.last - self.start) * 1000:8.1f} мс")
+        for source, (origin, elapsed) in decoded_cache.timings.items():
+            print(f"  {source} ({origin}) {elapsed * 1000:.1f} мс")
+
+startup_profiler = StartupProfiler()
+
+TEXT_CACHE_SIZE = 256
+
+class TextCache:
+    def __init__(self, max_size=TEXT_CACHE_SIZE):
+        self.max_size = max_size
+        self.fonts = {}
+        self.surfaces = OrderedDict()
+        
+    def font(self, size, name=None):
+        key = (name, size)
+        if key not in self.fonts:
+            self.fonts[key] = pygame.font.Font(name, size)
+        return self.fonts[key]
+    
+    def render(self, text, size, color, name=None):
+        key = (name, size, text, color)
+        surface = self.surfaces.get(key)
+        if surface is None:
+            surface = self.font(size, name).render(text, True, color)
+            self.surfaces[key] = surface
+            if len(self.surfaces) > self.max_size:
+                self.surfaces.popitem(last=False)
+        else:
+            self.surfaces.move_to_end(key)
+        return surface
+
+text_cache = TextCache()
+
+PROFILE_STAGES = ('idle', 'input', 'player', 'bullets', 'enemies', 'effects', 'platforms', 'entities', 'particles', 'hud', 'flip')
+PROFILE_COUNTERS = ('bullets', 'particles', 'enemies', 'platforms', 'chunks')
+PROFILE_HISTORY = 240
+
+class FrameProfiler:
+    def __init__(self, history=PROFILE_HISTORY):
+        self.stage_index = {stage: i for i, stage in enumerate(PROFILE_STAGES)}
+        self.history = np.zeros((history, len(PROFILE_STAGES)))
+        self.frame = np.zeros(len(PROFILE_STAGES))
+        self.counts = dict.fromkeys(PROFILE_COUNTERS, 0)
+        self.cpu_history = np.zeros(history)
+        self.wall_history = np.zeros(history)
+        self.frames = 0
+        self.last = time.perf_counter()
+        self.frame_start = self.last
+        self.cpu_start = time.process_time()
+        self.visible = False
+        self.rows = None
+        
+    @property
+    def active(self):
+        return self.visible or self.rows is not None
+        
+    def begin_frame(self):
+        self.frame[:] = 0.0
+        self.last = self.frame_start = time.perf_counter()
+        self.cpu_start = time.process_time()
+        
+    def lap(self, stage):
+        now = time.perf_counter()
+        self.frame[self.stage_index[stage]] += now - self.last
+        self.last = now
+        
+    def end_frame(self):
+        slot = self.frames % len(self.history)
+        self.history[slot] = self.frame
+        self.cpu_history[slot] = cpu = time.process_time() - self.cpu_start
+        self.wall_history[slot] = time.perf_counter() - self.frame_start
+        self.frames += 1
+        if self.rows is not None:
+            self.rows.append([self.frames] + [round(t * 1000, 4) for t in self.frame] +
+                             [round(cpu * 1000, 4)] + [self.counts[name] for name in PROFILE_COUNTERS])
+    
+    def cpu_usage(self):
+        frames = min(self.frames, len(self.history))
+        wall = self.wall_history[:frames].sum()
+        return self.cpu_history[:frames].sum() / wall * 100 if wall > 0 else 0.0
+            
+    def stats(self):
+        samples = self.history[:min(self.frames, len(self.history))] * 1000
+        if len(samples) == 0:
+            samples = np.zeros((1, len(PROFILE_STAGES)))
+        return samples.mean(axis=0), np.percentile(samples, 95, axis=0), samples.max(axis=0)
+        
+    def draw(self, screen):
+        font = text_cache.font(24)
+        mean, p95, peak = self.stats()
+        rows = [("этап", "сред", "p95", "макс")]
+        for i, stage in enumerate(PROFILE_STAGES):
+            rows.append((stage, f"{mean[i]:.2f}", f"{p95[i]:.2f}", f"{peak[i]:.2f}"))
+        busy = [i for i, stage in enumerate(PROFILE_STAGES) if stage != 'idle']
+        rows.append(("всего", f"{mean[busy].sum():.2f}", "", ""))
+        rows.append(("CPU", f"{self.cpu_usage():.0f}%", "", ""))
+        for name in PROFILE_COUNTERS:
+            rows.append((name, str(self.counts[name]), "", ""))
+        
+        line_height = font.get_linesize()
+        columns = (8, 150, 220, 290)
+        panel = pygame.Surface((360, line_height * len(rows) + 10), pygame.SRCALPHA)
+        panel.fill((0, 0, 0, 170))
+        for i, row in enumerate(rows):
+            for x, cell in zip(columns, row):
+                panel.blit(font.render(cell, True, WHITE), (x, 5 + i * line_height))
+        screen.blit(panel, (SCREEN_WIDTH - panel.get_width() - 20, 20))
+        
+    def write_csv(self, path):
+        with open(path, "w", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(["frame"] + [f"{stage}_ms" for stage in PROFILE_STAGES] + ["cpu_ms"] + list(PROFILE_COUNTERS))
+            writer.writerows(self.rows or [])
+        print(f"Профиль кадров записан в {path} ({len(self.rows or [])} кадров)")
+
+frame_profiler = FrameProfiler()
 
 class SoundManager:
     def __init__(self):
         self.sounds = {}
+        self.decoded_files = {}
         self.music_tracks = []
         self.current_music_index = 0
         self.music_volume = 0.5
         self.sound_volume = 0.7
-        self.load_sounds()
-        self.load_music()
+        self.music_loaded = False
         
-    def load_sounds(self):
-        try:
-            self.sounds['shotgun'] = self.load_sound("shoot_shotgun.mp3")
-            self.sounds['rifle'] = self.load_sound("shoot_rifle.mp3")
-            
-            self.sounds['running'] = self.load_sound("running.wav")
-            self.sounds['walking'] = self.load_sound("running.wav")
-            if self.sounds['walking']:
-                self.sounds['walking'].set_playback_rate(0.66)
-            
-            self.sounds['jump'] = self.load_sound("jump.wav")
-            self.sounds['dash'] = self.load_sound("dash.wav")
-            
-            self.sounds['reload'] = self.load_sound("rearmed.mp3")
-            
-            self.sounds['button'] = self.load_sound("menu_button.mp3")
-                
-        except Exception as e:
-            print(f"Ошибка загрузки звуков: {e}")
+    def get_sound(self, sound_name):
+        if sound_name not in self.sounds:
+            filename = SOUND_FILES.get(sound_name)
+            self.sounds[sound_name] = self.load_sound(filename) if filename else None
+        return self.sounds[sound_name]
     
     def load_sound(self, filename):
+        if filename not in self.decoded_files:
+            self.decoded_files[filename] = self.decode_sound(filename)
+        return self.decoded_files[filename]
+    
+    def decode_sound(self, filename):
         try:
             filepath = os.path.join("sound", filename)
             if os.path.exists(filepath):
@@ -154,6 +314,10 @@ class SoundManager:
                     self.sounds['music_stub'].play(loops=-1)
     
     def update_music(self):
+        if not self.music_loaded:
+            self.music_loaded = True
+            self.load_music()
+            
         if self.music_tracks and not pygame.mixer.music.get_busy():
             self.play_next_music()
         elif not self.music_tracks and 'music_stub' in self.sounds:
@@ -161,9 +325,10 @@ class SoundManager:
                 self.sounds['music_stub'].play(loops=-1)
     
     def play_sound(self, sound_name):
-        if sound_name in self.sounds and self.sounds[sound_name]:
+        sound = self.get_sound(sound_name)
+        if sound:
             try:
-                self.sounds[sound_name].play()
+                sound.play()
             except Exception as e:
                 print(f"Ошибка воспроизведения звука {sound_name}: {e}")
     
@@ -175,12 +340,466 @@ class SoundManager:
         
         play_with_delay(0)
 
-sound_manager = SoundManager()
+TRAIL_ALPHA_LEVELS = 5
+TRAIL_MAX_ALPHA = 100
+TRAIL_LIFETIME = 20
 
-class PlatformTextureManager:
+def fade_surface(surface, alpha):
+    faded = surface.copy()
+    alpha_surface = pygame.Surface(faded.get_size(), pygame.SRCALPHA)
+    alpha_surface.fill((255, 255, 255, alpha))
+    faded.blit(alpha_surface, (0, 0), special_flags=pygame.BLEND_RGBA_MULT)
+    return faded
+
+class SpriteSet:
+    def __init__(self, frames, variants=False):
+        self.right = tuple(frames)
+        self.left = tuple(pygame.transform.flip(frame, True, False) for frame in self.right)
+        self.right_faded = self.left_faded = self.trails = None
+        if variants:
+            self.build_variants()
+            
+    def build_variants(self):
+        self.right_faded = tuple(fade_surface(frame, 128) for frame in self.right)
+        self.left_faded = tuple(fade_surface(frame, 128) for frame in self.left)
+        
+        self.trails = {True: [], False: []}
+        for facing_right, frames in ((True, self.right), (False, self.left)):
+            for level in range(1, TRAIL_ALPHA_LEVELS + 1):
+                level_frames = []
+                for frame in frames:
+                    trail_frame = frame.copy()
+                    trail_frame.set_alpha(TRAIL_MAX_ALPHA * level // TRAIL_ALPHA_LEVELS)
+                    level_frames.append(trail_frame)
+                self.trails[facing_right].append(tuple(level_frames))
+                
+    def __len__(self):
+        return len(self.right)
+    
+    def get(self, index, facing_right=True, faded=False):
+        if facing_right:
+            return self.right_faded[index] if faded else self.right[index]
+        return self.left_faded[index] if faded else self.left[index]
+    
+    def trail(self, index, facing_right, lifetime):
+        level = max(1, min(TRAIL_ALPHA_LEVELS, -(-lifetime * TRAIL_ALPHA_LEVELS // TRAIL_LIFETIME)))
+        return self.trails[facing_right][level - 1][index]
+
+PRELOAD_IMAGES = [
+    "images/tiles.png",
+    "images/kubmove.png",
+    "images/jump_up.png",
+    "images/enemy_fly.png",
+    "images/enemy_ground.png",
+    "images/1l.png",
+    "images/1r.png",
+    "images/2l.png",
+    "images/2r.png"
+]
+
+class AssetCache:
+    def __init__(self):
+        self.images = {}
+        self.frame_sets = {}
+        self.sprite_sets = {}
+        
+    def image(self, path):
+        if path not in self.images:
+            self.store(path, pygame.image.load(path))
+        return self.images[path]
+    
+    def store(self, path, surface):
+        self.images[path] = surface.convert_alpha()
+    
+    def frames(self, path, frame_width, frame_height, count, flip=False):
+        key = (path, frame_width, frame_height, count, flip)
+        if key not in self.frame_sets:
+            sheet = self.image(path)
+            frames = []
+            for i in range(count):
+                frame = sheet.subsurface(pygame.Rect(i * frame_width, 0, frame_width, frame_height))
+                if flip:
+                    frame = pygame.transform.flip(frame, True, False)
+                frames.append(frame)
+            self.frame_sets[key] = tuple(frames)
+        return self.frame_sets[key]
+    
+    def sprite_set(self, path, frame_width, frame_height, count, flip=False, variants=False):
+        key = (path, frame_width, frame_height, count, flip)
+        if key not in self.sprite_sets:
+            self.sprite_sets[key] = SpriteSet(self.frames(path, frame_width, frame_height, count, flip), variants)
+        elif variants and self.sprite_sets[key].trails is None:
+            self.sprite_sets[key].build_variants()
+        return self.sprite_sets[key]
+    
+    def preload_sprites(self):
+        self.sprite_set("images/kubmove.png", 72, 72, 8, variants=True)
+        self.sprite_set("images/jump_up.png", 81, 85, 3, variants=True)
+        self.sprite_set("images/enemy_fly.png", 80, 40, 4, flip=True)
+        self.sprite_set("images/enemy_ground.png", 40, 80, 4, flip=True)
+        for weapon_type in (1, 2):
+            for side in ('l', 'r'):
+                self.sprite_set(f"images/{weapon_type}{side}.png", 128, 128, 5)
+
+assets = AssetCache()
+
+DECODED_CACHE_DIR = "cache"
+DECODED_CACHE_MAGIC = b"KUBC"
+DECODED_CACHE_VERSION = 1
+DECODED_CACHE_HEADER = struct.Struct("<4sIqqI")
+DECODED_CACHE_ENTRY = struct.Struct("<4i")
+
+class DecodedImageCache:
+    def __init__(self, cache_dir=DECODED_CACHE_DIR):
+        self.cache_dir = cache_dir
+        self.timings = {}
+        self.loaded = {}
+        
+    def cache_path(self, source):
+        return os.path.join(self.cache_dir, os.path.basename(source) + ".cache")
+    
+    def crop_layers(self, source, frame_rects):
+        sheet = pygame.image.load(source)
+        layers = []
+        for frame_rect in frame_rects:
+            frame = sheet.subsurface(frame_rect)
+            bounds = frame.get_bounding_rect()
+            layers.append((frame.subsurface(bounds).copy(), bounds))
+        return layers
+    
+    def read(self, source, stat):
+        path = self.cache_path(source)
+        if not os.path.exists(path):
+            return None
+            
+        try:
+            with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                magic, version, mtime_ns, size, count = DECODED_CACHE_HEADER.unpack_from(data, 0)
+                if (magic != DECODED_CACHE_MAGIC or version != DECODED_CACHE_VERSION or
+                        mtime_ns != stat.st_mtime_ns or size != stat.st_size):
+                    return None
+                    
+                offset = DECODED_CACHE_HEADER.size
+                rects = []
+                for _ in range(count):
+                    rects.append(pygame.Rect(DECODED_CACHE_ENTRY.unpack_from(data, offset)))
+                    offset += DECODED_CACHE_ENTRY.size
+                    
+                layers = []
+                for bounds in rects:
+                    length = bounds.width * bounds.height * 4
+                    with memoryview(data)[offset:offset + length] as pixels:
+                        layer = pygame.image.frombuffer(pixels, bounds.size, "RGBA").copy()
+                    layers.append((layer, bounds))
+                    offset += length
+                return layers
+        except (OSError, ValueError, struct.error) as e:
+            print(f"Ошибка чтения кэша {path}: {e}")
+            return None
+    
+    def write(self, source, stat, layers):
+        path = self.cache_path(source)
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            with open(path + ".tmp", "wb") as f:
+                f.write(DECODED_CACHE_HEADER.pack(DECODED_CACHE_MAGIC, DECODED_CACHE_VERSION,
+                                                  stat.st_mtime_ns, stat.st_size, len(layers)))
+                for _, bounds in layers:
+                    f.write(DECODED_CACHE_ENTRY.pack(*bounds))
+                for layer, _ in layers:
+                    f.write(pygame.image.tobytes(layer, "RGBA"))
+            os.replace(path + ".tmp", path)
+        except OSError as e:
+            print(f"Не удалось записать кэш {path}: {e}")
+    
+    def decode(self, source, frame_rects):
+        start = time.perf_counter()
+        stat = os.stat(source)
+        
+        layers = self.read(source, stat)
+        origin = "кэш"
+        if layers is None:
+            layers = self.crop_layers(source, frame_rects)
+            self.write(source, stat, layers)
+            origin = "PNG"
+            
+        elapsed = time.perf_counter() - start
+        self.timings[source] = (origin, elapsed)
+        return layers
+    
+    def store(self, source, layers):
+        self.loaded[source] = [(layer.convert_alpha(), bounds) for layer, bounds in layers]
+    
+    def load(self, source, frame_rects):
+        if source not in self.loaded:
+            self.store(source, self.decode(source, frame_rects))
+        return self.loaded[source]
+
+decoded_cache = DecodedImageCache()
+
+INTERFACE_SHEET = "images/interface.png"
+MENU_SHEET = "images/menu.png"
+SHEET_FRAME_WIDTH, SHEET_FRAME_HEIGHT = 1920, 1080
+
+def interface_frame_rects():
+    return [pygame.Rect(i * SHEET_FRAME_WIDTH, 0, SHEET_FRAME_WIDTH, SHEET_FRAME_HEIGHT) for i in range(9)]
+
+def menu_half_rects():
+    half_width = SHEET_FRAME_WIDTH // 2
+    return [
+        pygame.Rect(0 * SHEET_FRAME_WIDTH, 0, half_width, SHEET_FRAME_HEIGHT),
+        pygame.Rect(1 * SHEET_FRAME_WIDTH + half_width, 0, half_width, SHEET_FRAME_HEIGHT),
+        pygame.Rect(2 * SHEET_FRAME_WIDTH, 0, half_width, SHEET_FRAME_HEIGHT),
+        pygame.Rect(3 * SHEET_FRAME_WIDTH + half_width, 0, half_width, SHEET_FRAME_HEIGHT)
+    ]
+
+LOADER_JOIN_TIMEOUT = 5.0
+
+class AssetLoader:
     def __init__(self):
+        self.tasks = []
+        for path in PRELOAD_IMAGES:
+            self.tasks.append(('image', path, lambda path=path: pygame.image.load(path)))
+        self.tasks.append(('layers', INTERFACE_SHEET,
+                           lambda: decoded_cache.decode(INTERFACE_SHEET, interface_frame_rects())))
+        self.tasks.append(('layers', MENU_SHEET,
+                           lambda: decoded_cache.decode(MENU_SHEET, menu_half_rects())))
+        for filename in sorted(set(SOUND_FILES.values())):
+            self.tasks.append(('sound', filename, lambda filename=filename: sound_manager.decode_sound(filename)))
+            
+        self.total = len(self.tasks)
+        self.completed = 0
+        self.results = queue.Queue()
+        self.cancelled = threading.Event()
+        self.thread = threading.Thread(target=self.run, name="asset-loader", daemon=True)
+        
+    def start(self):
+        self.thread.start()
+        
+    def stop(self, timeout=LOADER_JOIN_TIMEOUT):
+        self.cancelled.set()
+        if self.thread.is_alive():
+            self.thread.join(timeout)
+        
+    def run(self):
+        for kind, key, task in self.tasks:
+            if self.cancelled.is_set():
+                return
+            try:
+                self.results.put((kind, key, task()))
+            except Exception as e:
+                print(f"Ошибка фоновой загрузки {key}: {e}")
+                self.results.put(('error', key, None))
+                
+    @property
+    def finished(self):
+        return self.completed >= self.total
+    
+    def poll(self):
+        while True:
+            try:
+                kind, key, result = self.results.get_nowait()
+            except queue.Empty:
+                return
+                
+            if kind == 'image':
+                assets.store(key, result)
+            elif kind == 'layers':
+                decoded_cache.store(key, result)
+            elif kind == 'sound':
+                sound_manager.decoded_files[key] = result
+            self.completed += 1
+
+NEIGHBOR_OFFSETS = [(0, -1), (0, 1), (-1, 0), (1, 0), (-1, -1), (1, -1), (-1, 1), (1, 1)]
+NEIGHBOR_NAMES = ['top', 'bottom', 'left', 'right', 'top_left', 'top_right', 'bottom_left', 'bottom_right']
+N_TOP, N_BOTTOM, N_LEFT, N_RIGHT = 1, 2, 4, 8
+
+TILE_ISOLATED = -1
+
+def build_tile_lut():
+    base = np.zeros(256, dtype=np.int8)
+    variants = np.ones(256, dtype=np.int8)
+    
+    for mask in range(256):
+        top, bottom = bool(mask & N_TOP), bool(mask & N_BOTTOM)
+        left, right = bool(mask & N_LEFT), bool(mask & N_RIGHT)
+        
+        if top and bottom and left and right:
+            base[mask] = 0
+        elif bottom and left and right and not top:
+            base[mask], variants[mask] = 1, 2
+        elif right and not left:
+            base[mask], variants[mask] = 3, 5
+        elif left and not right:
+            base[mask], variants[mask] = 8, 5
+        elif not left and not right:
+            base[mask] = TILE_ISOLATED
+        else:
+            base[mask] = 0
+            
+    return base, variants
+
+TILE_BASE, TILE_VARIANTS = build_tile_lut()
+
+class PlatformGrid:
+    def __init__(self, level_map, cell_size=BLOCK_SIZE):
+        self.cell_size = cell_size
+        self.rows = len(level_map)
+        self.cols = max((len(row) for row in level_map), default=0)
+        self.cells = {}
+        self.platforms = []
+
+        for ri, row in enumerate(level_map):
+            for ci, c in enumerate(row):
+                if c == "*":
+                    plat = pygame.Rect(ci * cell_size, ri * cell_size, cell_size, cell_size)
+                    self.cells[(ci, ri)] = plat
+                    self.platforms.append(plat)
+
+        self.occupancy = np.zeros((self.rows, self.cols), dtype=bool)
+        for col, row in self.cells:
+            self.occupancy[row, col] = True
+
+        self.group_ids = {}
+        self.group_bounds = []
+        self.label_groups()
+
+    def label_groups(self):
+        self.group_ids.clear()
+        self.group_bounds.clear()
+
+        for plat in self.platforms:
+            col, row = self.cell_at(plat.x, plat.y)
+            group_id = self.group_ids.get((col - 1, row))
+            if group_id is None:
+                group_id = len(self.group_bounds)
+                self.group_bounds.append(plat.copy())
+            else:
+                self.group_bounds[group_id].width = plat.right - self.group_bounds[group_id].left
+            self.group_ids[(col, row)] = group_id
+
+    def group_of(self, plat):
+        return self.group_ids.get(self.cell_at(plat.x, plat.y))
+
+    def cell_at(self, x, y):
+        return int(x // self.cell_size), int(y // self.cell_size)
+
+    def cell_range(self, rect):
+        left, top = self.cell_at(rect.left, rect.top)
+        right, bottom = self.cell_at(rect.right - 1, rect.bottom - 1)
+        return left, top, right, bottom
+
+    def get(self, col, row):
+        return self.cells.get((col, row))
+
+    def query_point(self, x, y):
+        return self.cells.get(self.cell_at(x, y))
+
+    def count_in_rect(self, rect):
+        left, top, right, bottom = self.cell_range(rect)
+        return int(self.occupancy[max(top, 0):max(bottom + 1, 0), max(left, 0):max(right + 1, 0)].sum())
+
+    def query_rect(self, rect):
+        left, top, right, bottom = self.cell_range(rect)
+        cells = self.cells
+        found = []
+        for row in range(top, bottom + 1):
+            for col in range(left, right + 1):
+                plat = cells.get((col, row))
+                if plat is not None:
+                    found.append(plat)
+        return found
+
+    def collide_rect(self, rect):
+        return [plat for plat in self.query_rect(rect) if rect.colliderect(plat)]
+
+    def any_collision(self, rect, exclude=None):
+        for plat in self.query_rect(rect):
+            if plat is not exclude and rect.colliderect(plat):
+                return True
+        return False
+
+    def occupied(self, cols, rows):
+        inside = (cols >= 0) & (cols < self.cols) & (rows >= 0) & (rows < self.rows)
+        found = np.zeros(len(cols), dtype=bool)
+        found[inside] = self.occupancy[rows[inside], cols[inside]]
+        return found
+
+    def swept_span(self, low, high, delta, t, lead):
+        size = self.cell_size
+        if delta > 0:
+            return range(math.floor((low + delta * t) / size), lead + 1)
+        if delta < 0:
+            return range(lead, math.ceil((high + delta * t) / size))
+        return range(low // size, (high - 1) // size + 1)
+
+    def sweep_rect(self, rect, dx, dy):
+        size = self.cell_size
+        cells = self.cells
+        left, top = rect.left // size, rect.top // size
+        right, bottom = (rect.right - 1) // size, (rect.bottom - 1) // size
+
+        for row in range(top, bottom + 1):
+            for col in range(left, right + 1):
+                if (col, row) in cells:
+                    return 0.0, None
+
+        if dx > 0:
+            col, step_col, t_x = right, 1, ((right + 1) * size - rect.right) / dx
+        elif dx < 0:
+            col, step_col, t_x = left, -1, (rect.left - left * size) / -dx
+        else:
+            col, step_col, t_x = 0, 0, math.inf
+
+        if dy > 0:
+            row, step_row, t_y = bottom, 1, ((bottom + 1) * size - rect.bottom) / dy
+        elif dy < 0:
+            row, step_row, t_y = top, -1, (rect.top - top * size) / -dy
+        else:
+            row, step_row, t_y = 0, 0, math.inf
+
+        while True:
+            if t_x <= t_y:
+                if t_x >= 1:
+                    return None
+                col += step_col
+                for r in self.swept_span(rect.top, rect.bottom, dy, t_x, row):
+                    if (col, r) in cells:
+                        return t_x, 'x'
+                t_x += size / abs(dx)
+            else:
+                if t_y >= 1:
+                    return None
+                row += step_row
+                for c in self.swept_span(rect.left, rect.right, dx, t_y, col):
+                    if (c, row) in cells:
+                        return t_y, 'y'
+                t_y += size / abs(dy)
+
+    def neighbor_masks(self):
+        padded = np.pad(self.occupancy, 1).astype(np.uint8)
+        masks = np.zeros((self.rows, self.cols), dtype=np.uint8)
+        for bit, (dx, dy) in enumerate(NEIGHBOR_OFFSETS):
+            masks |= padded[1 + dy:1 + dy + self.rows, 1 + dx:1 + dx + self.cols] << bit
+        return masks
+
+    def neighbors(self, col, row):
+        cells = self.cells
+        return {name: (col + dx, row + dy) in cells for name, (dx, dy) in zip(NEIGHBOR_NAMES, NEIGHBOR_OFFSETS)}
+
+class PlatformTextureManager:
+    def __init__(self, seed=None):
+        self.seed = seed if seed is not None else random.randrange(2 ** 32)
+        self.layout_cache = {}
+        self.combined_textures = {}
+        self.platform_textures = {}
+        self.platform_decorations = {}
+        self.chunk_contents = {}
+        self.chunks = OrderedDict()
+        self.chunks_drawn = 0
+        
         try:
-            self.tiles_sheet = pygame.image.load("images/tiles.png").convert_alpha()
+            self.tiles_sheet = assets.image("images/tiles.png")
         except:
             print("Ошибка загрузки images/tiles.png. Создаем заглушки.")
             self.create_fallback_tiles()
@@ -223,14 +842,10 @@ class PlatformTextureManager:
             fallback = pygame.Surface((self.tile_size, self.tile_size))
             color = (random.randint(50, 200), random.randint(50, 200), random.randint(50, 200))
             fallback.fill(color)
-            font = pygame.font.Font(None, 24)
-            text = font.render(str(len(self.tiles)), True, (255, 255, 255))
+            text = text_cache.render(str(len(self.tiles)), 24, (255, 255, 255))
             fallback.blit(text, (10, 10))
             self.tiles.append(fallback)
         
-        self.platform_textures = {}
-        self.platform_decorations = {}
-        
     def create_fallback_tiles(self):
         self.tile_size = 80
         self.tile_count = 19
@@ -263,304 +878,389 @@ class PlatformTextureManager:
             color = colors[i] if i < len(colors) else (random.randint(50, 200), random.randint(50, 200), random.randint(50, 200))
             tile.fill(color)
             
-            font = pygame.font.Font(None, 36)
-            text = font.render(str(i), True, (255, 255, 255))
+            text = text_cache.render(str(i), 36, (255, 255, 255))
             text_rect = text.get_rect(center=(self.tile_size//2, self.tile_size//2))
             tile.blit(text, text_rect)
             
             self.tiles.append(tile)
     
-    def has_platform_at(self, x, y):
-        for plat in platforms:
-            if plat.x == x and plat.y == y:
-                return True
-        return False
-    
-    def get_surrounding_platforms(self, platform):
-        x, y = platform.x, platform.y
-        
-        return {
-            'top': self.has_platform_at(x, y - BLOCK_SIZE),
-            'bottom': self.has_platform_at(x, y + BLOCK_SIZE),
-            'left': self.has_platform_at(x - BLOCK_SIZE, y),
-            'right': self.has_platform_at(x + BLOCK_SIZE, y),
-            'top_left': self.has_platform_at(x - BLOCK_SIZE, y - BLOCK_SIZE),
-            'top_right': self.has_platform_at(x + BLOCK_SIZE, y - BLOCK_SIZE),
-            'bottom_left': self.has_platform_at(x - BLOCK_SIZE, y + BLOCK_SIZE),
-            'bottom_right': self.has_platform_at(x + BLOCK_SIZE, y + BLOCK_SIZE)
-        }
-    
     def get_platform_key(self, platform):
         return (platform.x, platform.y)
     
-    def assign_textures(self):
-        self.platform_textures.clear()
-        self.platform_decorations.clear()
+    def get_combined_texture(self, left_texture_idx, right_texture_idx):
+        key = (left_texture_idx, right_texture_idx)
+        if key not in self.combined_textures:
+            combined_surface = pygame.Surface((BLOCK_SIZE, BLOCK_SIZE), pygame.SRCALPHA)
+            
+            left_part = self.tiles[left_texture_idx].subsurface(pygame.Rect(0, 0, 40, BLOCK_SIZE))
+            right_part = self.tiles[right_texture_idx].subsurface(pygame.Rect(40, 0, 40, BLOCK_SIZE))
+            
+            combined_surface.blit(left_part, (0, 0))
+            combined_surface.blit(right_part, (40, 0))
+            
+            self.combined_textures[key] = combined_surface
+        return self.combined_textures[key]
+    
+    def build_layout(self, seed):
+        rng = np.random.default_rng(seed)
+        occupancy = platform_grid.occupancy
+        masks = platform_grid.neighbor_masks()
+        shape = masks.shape
+        
+        texture_index = TILE_BASE[masks] + (rng.random(shape) * TILE_VARIANTS[masks]).astype(np.int8)
+        left_halves = rng.integers(3, 8, shape)
+        right_halves = rng.integers(8, 13, shape)
+        
+        isolated = occupancy & (TILE_BASE[masks] == TILE_ISOLATED)
+        decorated = occupancy & ~isolated & (rng.random(shape) < 0.1)
+        ceiling = decorated & ((masks & N_BOTTOM) == 0) & (rng.random(shape) < 0.3)
+        surface = decorated & ~ceiling & ((masks & N_TOP) == 0) & (rng.random(shape) < 0.4)
+        
+        textures = {}
+        decorations = {}
+        ceiling_texture = self.tiles[13 if 13 < len(self.tiles) else 0]
+        surface_texture = self.tiles[min(15, len(self.tiles) - 1)]
         
         for platform in platforms:
             platform_key = self.get_platform_key(platform)
-            neighbors = self.get_surrounding_platforms(platform)
+            col, row = platform_grid.cell_at(platform.x, platform.y)
             
-            if (neighbors['top'] and neighbors['bottom'] and 
-                neighbors['left'] and neighbors['right']):
-                texture_index = 0
-                
-            elif (sum([neighbors['bottom'], neighbors['left'], neighbors['right']]) == 3 and 
-                  not neighbors['top']):
-                texture_index = random.choice([1, 2])
-                
-            elif neighbors['right'] and not neighbors['left']:
-                texture_index = random.randint(3, 7)
-                
-            elif neighbors['left'] and not neighbors['right']:
-                texture_index = random.randint(8, 12)
-                
-            elif not neighbors['left'] and not neighbors['right']:
-                left_texture_idx = random.randint(3, 7)
-                right_texture_idx = random.randint(8, 12)
-                
-                combined_surface = pygame.Surface((BLOCK_SIZE, BLOCK_SIZE), pygame.SRCALPHA)
-                
-                left_part = self.tiles[left_texture_idx].subsurface(pygame.Rect(0, 0, 40, BLOCK_SIZE))
-                right_part = self.tiles[right_texture_idx].subsurface(pygame.Rect(40, 0, 40, BLOCK_SIZE))
-                
-                combined_surface.blit(left_part, (0, 0))
-                combined_surface.blit(right_part, (40, 0))
-                
-                self.platform_textures[platform_key] = combined_surface
+            if isolated[row, col]:
+                textures[platform_key] = self.get_combined_texture(int(left_halves[row, col]),
+                                                                   int(right_halves[row, col]))
                 continue
-                
-            else:
-                texture_index = 0
             
-            if texture_index < len(self.tiles):
-                self.platform_textures[platform_key] = self.tiles[texture_index]
-            else:
-                self.platform_textures[platform_key] = self.tiles[0]
-            
-            if random.random() < 0.1:
-                if not neighbors['bottom'] and random.random() < 0.3:
-                    decoration_index = 13 if 13 < len(self.tiles) else 0
-                    self.platform_decorations[platform_key] = {
-                        'type': 'ceiling',
-                        'texture': self.tiles[decoration_index],
-                        'offset_y': BLOCK_SIZE
-                    }
+            index = int(texture_index[row, col])
+            textures[platform_key] = self.tiles[index] if index < len(self.tiles) else self.tiles[0]
+            
+            if ceiling[row, col]:
+                decorations[platform_key] = {
+                    'type': 'ceiling',
+                    'texture': ceiling_texture,
+                    'offset_y': BLOCK_SIZE
+                }
+            elif surface[row, col]:
+                decorations[platform_key] = {
+                    'type': 'surface',
+                    'texture': surface_texture,
+                    'offset_y': -BLOCK_SIZE
+                }
                 
-                elif not neighbors['top'] and random.random() < 0.4:
-                    decoration_index = min(15, len(self.tiles) - 1)
-                    self.platform_decorations[platform_key] = {
-                        'type': 'surface', 
-                        'texture': self.tiles[decoration_index],
-                        'offset_y': -BLOCK_SIZE
-                    }
+        return textures, decorations
     
-    def draw_platforms(self, camera_x, camera_y):
+    def assign_textures(self, seed=None):
+        if seed is not None:
+            self.seed = seed
+            
+        if self.seed not in self.layout_cache:
+            textures, decorations = self.build_layout(self.seed)
+            self.layout_cache[self.seed] = (textures, decorations, self.chunk_layout(textures, decorations))
+            
+        self.platform_textures, self.platform_decorations, self.chunk_contents = self.layout_cache[self.seed]
+        
+        if len(self.chunk_contents) <= CHUNK_CACHE_SIZE:
+            for cx, cy in self.chunk_contents:
+                if self.chunk(cx, cy) is None:
+                    self.bake(cx, cy)
+    
+    def place_in_chunks(self, contents, texture, x, y):
+        if texture.get_size() != (BLOCK_SIZE, BLOCK_SIZE):
+            texture = pygame.transform.scale(texture, (BLOCK_SIZE, BLOCK_SIZE))
+            
+        for cy in range(y // CHUNK_SIZE, (y + BLOCK_SIZE - 1) // CHUNK_SIZE + 1):
+            for cx in range(x // CHUNK_SIZE, (x + BLOCK_SIZE - 1) // CHUNK_SIZE + 1):
+                contents.setdefault((cx, cy), []).append((texture, (x - cx * CHUNK_SIZE, y - cy * CHUNK_SIZE)))
+    
+    def chunk_layout(self, textures, decorations):
+        contents = {}
+        fill = None
+        
         for platform in platforms:
             platform_key = self.get_platform_key(platform)
             
-            if platform_key in self.platform_textures:
-                texture = self.platform_textures[platform_key]
-                if texture.get_size() != (BLOCK_SIZE, BLOCK_SIZE):
-                    texture = pygame.transform.scale(texture, (BLOCK_SIZE, BLOCK_SIZE))
-                screen.blit(texture, (platform.x - camera_x, platform.y - camera_y))
+            if platform_key in textures:
+                self.place_in_chunks(contents, textures[platform_key], platform.x, platform.y)
             else:
-                pygame.draw.rect(screen, WHITE, 
-                               (platform.x - camera_x, platform.y - camera_y, 
-                                platform.width, platform.height))
-            
-            if platform_key in self.platform_decorations:
-                decoration = self.platform_decorations[platform_key]
-                texture = decoration['texture']
-                if texture.get_size() != (BLOCK_SIZE, BLOCK_SIZE):
-                    texture = pygame.transform.scale(texture, (BLOCK_SIZE, BLOCK_SIZE))
-                screen.blit(texture,
-                           (platform.x - camera_x, 
-                            platform.y - camera_y + decoration['offset_y']))
-
-texture_manager = PlatformTextureManager()
-
-class Particle:
-    def __init__(self, x, y, particle_type, direction=None, count=10):
-        self.particles = []
-        self.type = particle_type
-        
-        if particle_type == 'bullet_impact':
-            for _ in range(count):
-                angle = random.uniform(0, math.pi * 2)
-                speed = random.uniform(2, 8)
-                size = random.randint(2, 6)
-                lifetime = random.uniform(20, 40)
-                color = random.choice(PARTICLE_COLORS['bullet_impact'])
-                
-                self.particles.append({
-                    'x': x, 'y': y,
-                    'vx': math.cos(angle) * speed,
-                    'vy': math.sin(angle) * speed,
-                    'size': size,
-                    'lifetime': lifetime,
-                    'max_lifetime': lifetime,
-                    'color': color
-                })
-                
-        elif particle_type == 'jump':
-            for _ in range(count):
-                angle = random.uniform(math.pi * 0.7, math.pi * 1.3)
-                speed = random.uniform(3, 7)
-                size = random.randint(3, 7)
-                lifetime = random.uniform(15, 25)
-                color = random.choice(PARTICLE_COLORS['jump'])
-                
-                self.particles.append({
-                    'x': x, 'y': y,
-                    'vx': math.cos(angle) * speed * random.choice([-1, 1]),
-                    'vy': math.sin(angle) * speed,
-                    'size': size,
-                    'lifetime': lifetime,
-                    'max_lifetime': lifetime,
-                    'color': color
-                })
-                
-        elif particle_type == 'land':
-            for _ in range(count * 2):
-                angle = random.uniform(0, math.pi)
-                speed = random.uniform(2, 6)
-                size = random.randint(2, 5)
-                lifetime = random.uniform(20, 30)
-                color = random.choice(PARTICLE_COLORS['land'])
-                
-                self.particles.append({
-                    'x': x + random.uniform(-20, 20), 
-                    'y': y,
-                    'vx': random.uniform(-2, 2),
-                    'vy': -math.sin(angle) * speed,
-                    'size': size,
-                    'lifetime': lifetime,
-                    'max_lifetime': lifetime,
-                    'color': color
-                })
-                
-        elif particle_type == 'run':
-            for _ in range(count // 2):
-                size = random.randint(2, 4)
-                lifetime = random.uniform(10, 20)
-                color = random.choice(PARTICLE_COLORS['run'])
-                
-                self.particles.append({
-                    'x': x + random.uniform(-15, 15), 
-                    'y': y + 10,
-                    'vx': random.uniform(-1, 1) + (direction * 2 if direction else 0),
-                    'vy': random.uniform(1, 3),
-                    'size': size,
-                    'lifetime': lifetime,
-                    'max_lifetime': lifetime,
-                    'color': color
-                })
-                
-        elif particle_type == 'wall_jump':
-            wall_direction = direction if direction else 1
-            for _ in range(count):
-                angle = random.uniform(math.pi * 0.25, math.pi * 0.75) if wall_direction > 0 else \
-                        random.uniform(math.pi * 1.25, math.pi * 1.75)
-                speed = random.uniform(3, 8)
-                size = random.randint(3, 6)
-                lifetime = random.uniform(20, 30)
-                color = random.choice(PARTICLE_COLORS['wall_jump'])
-                
-                self.particles.append({
-                    'x': x, 'y': y,
-                    'vx': math.cos(angle) * speed,
-                    'vy': math.sin(angle) * speed,
-                    'size': size,
-                    'lifetime': lifetime,
-                    'max_lifetime': lifetime,
-                    'color': color
-                })
-
-        elif particle_type == 'blood':
-            for _ in range(count):
-                angle = random.uniform(0, math.pi * 2)
-                speed = random.uniform(3, 10)
-                size = random.randint(3, 7)
-                lifetime = random.uniform(20, 40)
-                color = random.choice(PARTICLE_COLORS['blood'])
-                
-                self.particles.append({
-                    'x': x, 'y': y,
-                    'vx': math.cos(angle) * speed,
-                    'vy': math.sin(angle) * speed,
-                    'size': size,
-                    'lifetime': lifetime,
-                    'max_lifetime': lifetime,
-                    'color': color
-                })
-    
-    def update(self):
-        for particle in self.particles[:]:
-            particle['x'] += particle['vx']
-            particle['y'] += particle['vy']
-            particle['lifetime'] -= 1
-            
-            if self.type in ['bullet_impact', 'land', 'run']:
-                particle['vy'] += 0.2
-                
-            if particle['lifetime'] <= 0:
-                self.particles.remove(particle)
+                if fill is None:
+                    fill = pygame.Surface((BLOCK_SIZE, BLOCK_SIZE))
+                    fill.fill(WHITE)
+                self.place_in_chunks(contents, fill, platform.x, platform.y)
+            
+            if platform_key in decorations:
+                decoration = decorations[platform_key]
+                self.place_in_chunks(contents, decoration['texture'],
+                                     platform.x, platform.y + decoration['offset_y'])
                 
-        return len(self.particles) > 0
+        return contents
+    
+    def chunk(self, cx, cy):
+        key = (self.seed, cx, cy)
+        chunk = self.chunks.get(key)
+        if chunk is not None:
+            self.chunks.move_to_end(key)
+        return chunk
+    
+    def bake(self, cx, cy):
+        chunk = pygame.Surface((CHUNK_SIZE, CHUNK_SIZE), pygame.SRCALPHA)
+        chunk.blits(self.chunk_contents[(cx, cy)], doreturn=False)
+        chunk.set_alpha(255, pygame.RLEACCEL)
+        
+        self.chunks[(self.seed, cx, cy)] = chunk
+        if len(self.chunks) > CHUNK_CACHE_SIZE:
+            self.chunks.popitem(last=False)
+        return chunk
+    
+    def prebake(self, camera_x, camera_y, budget=CHUNK_BAKE_BUDGET):
+        offset_x, offset_y = math.floor(camera_x), math.floor(camera_y)
+        
+        first_cx, first_cy = offset_x // CHUNK_SIZE, offset_y // CHUNK_SIZE
+        last_cx = (offset_x + SCREEN_WIDTH - 1) // CHUNK_SIZE
+        last_cy = (offset_y + SCREEN_HEIGHT - 1) // CHUNK_SIZE
+        
+        ring = []
+        for cy in range(first_cy - 1, last_cy + 2):
+            for cx in range(first_cx - 1, last_cx + 2):
+                if (cx, cy) in self.chunk_contents and self.chunk(cx, cy) is None:
+                    visible = first_cx <= cx <= last_cx and first_cy <= cy <= last_cy
+                    ring.append((not visible, cx, cy))
+                    
+        for _, cx, cy in sorted(ring)[:budget]:
+            self.bake(cx, cy)
     
-    def draw(self, camera_x, camera_y):
-        for particle in self.particles:
-            alpha = int(255 * (particle['lifetime'] / particle['max_lifetime']))
-            color = (*particle['color'], alpha)
-            
-            surf = pygame.Surface((particle['size'] * 2, particle['size'] * 2), pygame.SRCALPHA)
-            pygame.draw.circle(surf, color, (particle['size'], particle['size']), particle['size'])
-            screen.blit(surf, (particle['x'] - camera_x - particle['size'], 
-                             particle['y'] - camera_y - particle['size']))
+    def draw_platforms(self, camera_x, camera_y):
+        offset_x, offset_y = math.floor(camera_x), math.floor(camera_y)
+        
+        first_cx, first_cy = offset_x // CHUNK_SIZE, offset_y // CHUNK_SIZE
+        last_cx = (offset_x + SCREEN_WIDTH - 1) // CHUNK_SIZE
+        last_cy = (offset_y + SCREEN_HEIGHT - 1) // CHUNK_SIZE
+        
+        self.chunks_drawn = 0
+        for cy in range(first_cy, last_cy + 1):
+            for cx in range(first_cx, last_cx + 1):
+                x, y = cx * CHUNK_SIZE - offset_x, cy * CHUNK_SIZE - offset_y
+                chunk = self.chunk(cx, cy)
+                if chunk is not None:
+                    screen.blit(chunk, (x, y))
+                    self.chunks_drawn += 1
+                elif (cx, cy) in self.chunk_contents:
+                    screen.blits([(texture, (x + tile_x, y + tile_y))
+                                  for texture, (tile_x, tile_y) in self.chunk_contents[(cx, cy)]], doreturn=False)
+
+MAX_PARTICLES = 16384
+PARTICLE_GRAVITY = 0.2
+GRAVITY_PARTICLES = ('bullet_impact', 'land', 'run')
+
+P_X, P_Y, P_VX, P_VY, P_SIZE, P_LIFE, P_MAX_LIFE, P_COLOR, P_GRAVITY = range(9)
+PARTICLE_FIELDS = 9
+
+PARTICLE_MIN_SIZE, PARTICLE_MAX_SIZE = 2, 7
+PARTICLE_SIZES = PARTICLE_MAX_SIZE - PARTICLE_MIN_SIZE + 1
+PARTICLE_ALPHA_LEVELS = 16
+
+def build_particle_palette():
+    palette = []
+    offsets = {}
+    for particle_type, colors in PARTICLE_COLORS.items():
+        offsets[particle_type] = (len(palette), len(colors))
+        palette.extend(colors)
+    return palette, offsets
+
+PARTICLE_PALETTE, PARTICLE_PALETTE_OFFSETS = build_particle_palette()
+
+def build_particle_sprites():
+    sprites = []
+    for color in PARTICLE_PALETTE:
+        for size in range(PARTICLE_MIN_SIZE, PARTICLE_MAX_SIZE + 1):
+            for level in range(PARTICLE_ALPHA_LEVELS):
+                alpha = level * 255 // (PARTICLE_ALPHA_LEVELS - 1)
+                surf = pygame.Surface((size * 2, size * 2), pygame.SRCALPHA)
+                pygame.draw.circle(surf, (*color, alpha), (size, size), size)
+                sprites.append(surf)
+    return sprites
 
 class EffectManager:
-    def __init__(self):
-        self.effects = []
+    def __init__(self, capacity=MAX_PARTICLES):
+        self.capacity = capacity
+        self.data = np.zeros((PARTICLE_FIELDS, capacity), dtype=np.float32)
+        self.count = 0
+        self.rng = np.random.default_rng()
+        self.sprites = build_particle_sprites()
+        
+    def seed(self, seed):
+        self.rng = np.random.default_rng(seed)
+        
+    def clear(self):
+        self.count = 0
+        
+    def add_effect(self, x, y, effect_type, direction=None, count=10, gravity=None):
+        rng = self.rng
+        
+        if effect_type == 'land':
+            n = count * 2
+        elif effect_type == 'run':
+            n = count // 2
+        else:
+            n = count
+            
+        if not np.isscalar(n):
+            x, y = np.repeat(x, n), np.repeat(y, n)
+            n = len(x)
+            
+        if effect_type == 'bullet_impact':
+            angle = rng.uniform(0, math.pi * 2, n)
+            speed = rng.uniform(2, 8, n)
+            size = rng.integers(2, 7, n)
+            lifetime = rng.uniform(20, 40, n)
+            vx = np.cos(angle) * speed
+            vy = np.sin(angle) * speed
+            px, py = x, y
+            
+        elif effect_type == 'jump':
+            angle = rng.uniform(math.pi * 0.7, math.pi * 1.3, n)
+            speed = rng.uniform(3, 7, n)
+            size = rng.integers(3, 8, n)
+            lifetime = rng.uniform(15, 25, n)
+            vx = np.cos(angle) * speed * rng.choice([-1, 1], n)
+            vy = np.sin(angle) * speed
+            px, py = x, y
+            
+        elif effect_type == 'land':
+            angle = rng.uniform(0, math.pi, n)
+            speed = rng.uniform(2, 6, n)
+            size = rng.integers(2, 6, n)
+            lifetime = rng.uniform(20, 30, n)
+            vx = rng.uniform(-2, 2, n)
+            vy = -np.sin(angle) * speed
+            px, py = x + rng.uniform(-20, 20, n), y
+            
+        elif effect_type == 'run':
+            size = rng.integers(2, 5, n)
+            lifetime = rng.uniform(10, 20, n)
+            vx = rng.uniform(-1, 1, n) + (direction * 2 if direction else 0)
+            vy = rng.uniform(1, 3, n)
+            px, py = x + rng.uniform(-15, 15, n), y + 10
+            
+        elif effect_type == 'wall_jump':
+            wall_direction = direction if direction else 1
+            if wall_direction > 0:
+                angle = rng.uniform(math.pi * 0.25, math.pi * 0.75, n)
+            else:
+                angle = rng.uniform(math.pi * 1.25, math.pi * 1.75, n)
+            speed = rng.uniform(3, 8, n)
+            size = rng.integers(3, 7, n)
+            lifetime = rng.uniform(20, 30, n)
+            vx = np.cos(angle) * speed
+            vy = np.sin(angle) * speed
+            px, py = x, y
+            
+        elif effect_type == 'blood':
+            angle = rng.uniform(0, math.pi * 2, n)
+            speed = rng.uniform(3, 10, n)
+            size = rng.integers(3, 8, n)
+            lifetime = rng.uniform(20, 40, n)
+            vx = np.cos(angle) * speed
+            vy = np.sin(angle) * speed
+            px, py = x, y
+            
+        else:
+            return
+        
+        if gravity is None:
+            gravity = effect_type in GRAVITY_PARTICLES
+            
+        color_offset, color_count = PARTICLE_PALETTE_OFFSETS[effect_type]
+        color = color_offset + rng.integers(0, color_count, n)
+        
+        self.emit(n, px, py, vx, vy, size, lifetime, color, gravity)
         
-    def add_effect(self, x, y, effect_type, direction=None, count=10):
-        self.effects.append(Particle(x, y, effect_type, direction, count))
+    def emit(self, n, x, y, vx, vy, size, lifetime, color, gravity):
+        n = min(n, self.capacity - self.count)
+        if n <= 0:
+            return
+            
+        block = self.data[:, self.count:self.count + n]
+        block[P_X] = x if np.isscalar(x) else x[:n]
+        block[P_Y] = y if np.isscalar(y) else y[:n]
+        block[P_VX] = vx[:n]
+        block[P_VY] = vy[:n]
+        block[P_SIZE] = size[:n]
+        block[P_LIFE] = lifetime[:n]
+        block[P_MAX_LIFE] = lifetime[:n]
+        block[P_COLOR] = color[:n]
+        block[P_GRAVITY] = 1.0 if gravity else 0.0
+        self.count += n
         
     def update(self):
-        for effect in self.effects[:]:
-            if not effect.update():
-                self.effects.remove(effect)
+        n = self.count
+        if n == 0:
+            return
+            
+        live = self.data[:, :n]
+        live[P_X] += live[P_VX]
+        live[P_Y] += live[P_VY]
+        live[P_LIFE] -= 1
+        live[P_VY] += live[P_GRAVITY] * PARTICLE_GRAVITY
+        
+        alive = live[P_LIFE] > 0
+        if not alive.all():
+            keep = np.flatnonzero(alive)
+            self.data[:, :len(keep)] = live[:, keep]
+            self.count = len(keep)
                 
     def draw(self, camera_x, camera_y):
-        for effect in self.effects:
-            effect.draw(camera_x, camera_y)
-
-effect_manager = EffectManager()
+        n = self.count
+        if n == 0:
+            return
+            
+        live = self.data[:, :n]
+        size = live[P_SIZE].astype(np.int32)
+        screen_x = (live[P_X] - camera_x - size).astype(np.int32)
+        screen_y = (live[P_Y] - camera_y - size).astype(np.int32)
+        
+        alpha = (255 * live[P_LIFE] / live[P_MAX_LIFE]).astype(np.int32)
+        level = (alpha * (PARTICLE_ALPHA_LEVELS - 1) + 127) // 255
+        
+        visible = ((level > 0) &
+                   (screen_x > -size * 2) & (screen_x < SCREEN_WIDTH) &
+                   (screen_y > -size * 2) & (screen_y < SCREEN_HEIGHT))
+        
+        sprite_index = ((live[P_COLOR].astype(np.int32) * PARTICLE_SIZES + size - PARTICLE_MIN_SIZE)
+                        * PARTICLE_ALPHA_LEVELS + level)
+        
+        sprites = self.sprites
+        screen.blits([(sprites[i], (x, y)) for i, x, y in zip(sprite_index[visible].tolist(),
+                                                               screen_x[visible].tolist(),
+                                                               screen_y[visible].tolist())],
+                     doreturn=False)
 
 class InterfaceManager:
     def __init__(self):
-        try:
-            self.interface_sheet = pygame.image.load("images/interface.png").convert_alpha()
-        except:
-            print("Ошибка загрузки images/interface.png")
-            self.interface_sheet = None
-            return
-            
+        self.layers = []
+        self.hud_rect = None
+        self.hud_surface = None
+        self.hud_state = None
+        
+        self.current_bullets = 0
+        self.dash_available = False
+        self.extra_jump_available = False
+        
         self.sheet_width = 17280
         self.sheet_height = 1080
         self.frame_width = 1920
         self.frame_height = 1080
         self.total_frames = 9
+        self.loaded = False
+        
+    def load(self):
+        self.loaded = True
         
-        self.frames = []
-        for i in range(self.total_frames):
-            frame_rect = pygame.Rect(i * self.frame_width, 0, self.frame_width, self.frame_height)
-            frame = self.interface_sheet.subsurface(frame_rect)
-            self.frames.append(frame)
+        try:
+            self.layers = decoded_cache.load(INTERFACE_SHEET, interface_frame_rects())
+        except:
+            print("Ошибка загрузки images/interface.png")
+            return
             
-        self.current_bullets = 0
-        self.dash_available = False
-        self.extra_jump_available = False
+        self.hud_rect = self.layers[0][1].unionall([bounds for _, bounds in self.layers])
         
     def update_state(self, weapon_system, player):
         self.current_bullets = 6 - weapon_system.shot_count
@@ -569,22 +1269,42 @@ class InterfaceManager:
         
         self.extra_jump_available = player.jump_count < 2
         
-    def draw(self, screen):
-        if not self.interface_sheet:
-            return
-            
-        screen.blit(self.frames[0], (0, 0))
+    def visible_layers(self):
+        visible = [0]
         
         if 1 <= self.current_bullets <= 6:
             bullet_frame_index = 7 - self.current_bullets
             if 1 <= bullet_frame_index <= 6:
-                screen.blit(self.frames[bullet_frame_index], (0, 0))
+                visible.append(bullet_frame_index)
         
         if self.dash_available:
-            screen.blit(self.frames[7], (0, 0))
+            visible.append(7)
             
         if self.extra_jump_available:
-            screen.blit(self.frames[8], (0, 0))
+            visible.append(8)
+            
+        return visible
+    
+    def compose(self):
+        hud_surface = pygame.Surface(self.hud_rect.size, pygame.SRCALPHA)
+        for index in self.visible_layers():
+            layer, bounds = self.layers[index]
+            hud_surface.blit(layer, (bounds.x - self.hud_rect.x, bounds.y - self.hud_rect.y))
+        return hud_surface
+        
+    def draw(self, screen):
+        if not self.loaded:
+            self.load()
+            
+        if not self.layers:
+            return
+            
+        state = (self.current_bullets, self.dash_available, self.extra_jump_available)
+        if state != self.hud_state:
+            self.hud_surface = self.compose()
+            self.hud_state = state
+            
+        screen.blit(self.hud_surface, self.hud_rect.topleft)
 
 class Player:
     def __init__(self, x, y):
@@ -605,11 +1325,11 @@ class Player:
         self.was_on_wall = False
         self.last_move_direction = 1
         
-        self.animation_sheet = pygame.image.load("images/kubmove.png").convert_alpha()
         self.sprite_width = 72
         self.sprite_height = 72
         self.sprite_count = 8
-        self.sprites = []
+        self.sprites = assets.sprite_set("images/kubmove.png", self.sprite_width, self.sprite_height, self.sprite_count,
+                                         variants=True)
         self.current_sprite = 0
         self.animation_speed = 0.2
         self.animation_timer = 0
@@ -617,11 +1337,11 @@ class Player:
         self.is_moving = False
         self.moving_backwards = False
         
-        self.jump_sheet = pygame.image.load("images/jump_up.png").convert_alpha()
         self.jump_sprite_width = 81
         self.jump_sprite_height = 85
         self.jump_sprite_count = 3
-        self.jump_sprites = []
+        self.jump_sprites = assets.sprite_set("images/jump_up.png", self.jump_sprite_width,
+                                          self.jump_sprite_height, self.jump_sprite_count, variants=True)
         self.jump_animation_timer = 0
         self.jump_animation_speed = 0.15
         self.is_jumping = False
@@ -629,16 +1349,6 @@ class Player:
         self.current_jump_sprite = 0
         self.jump_started_from_ground = False
 
-        for i in range(self.sprite_count):
-            sprite_rect = pygame.Rect(i * self.sprite_width, 0, self.sprite_width, self.sprite_height)
-            sprite = self.animation_sheet.subsurface(sprite_rect)
-            self.sprites.append(sprite)
-            
-        for i in range(self.jump_sprite_count):
-            sprite_rect = pygame.Rect(i * self.jump_sprite_width, 0, self.jump_sprite_width, self.jump_sprite_height)
-            sprite = self.jump_sheet.subsurface(sprite_rect)
-            self.jump_sprites.append(sprite)
-
         self.dash_cooldown = 0
         self.dash_duration = 0
         self.dash_speed = 40.0
@@ -692,52 +1402,43 @@ class Player:
             
     def create_dash_trail(self):
         if self.is_jumping:
-            current_sprite = self.jump_sprites[self.current_jump_sprite]
+            sprite_set = self.jump_sprites
+            sprite_index = self.current_jump_sprite
             y_offset = -25
         else:
-            current_sprite = self.sprites[self.current_sprite]
+            sprite_set = self.sprites
+            sprite_index = self.current_sprite
             y_offset = 0
-            
-        if not self.facing_right:
-            current_sprite = pygame.transform.flip(current_sprite, True, False)
-        
-        trail_sprite = current_sprite.copy()
-        trail_sprite.set_alpha(100)
         
         self.dash_trails.append({
-            'sprite': trail_sprite,
+            'sprites': sprite_set,
+            'index': sprite_index,
             'x': self.rect.x,
             'y': self.rect.y + y_offset,
-            'lifetime': 20,
-            'facing_right': self.facing_right,
-            'is_jumping': self.is_jumping,
-            'current_sprite': self.current_sprite,
-            'current_jump_sprite': self.current_jump_sprite
+            'lifetime': TRAIL_LIFETIME,
+            'facing_right': self.facing_right
         })
             
     def update_dash_trails(self):
-        for trail in self.dash_trails[:]:
+        for trail in self.dash_trails:
             trail['lifetime'] -= 1
-            if trail['lifetime'] > 0:
-                alpha = int(100 * (trail['lifetime'] / 20))
-                trail['sprite'].set_alpha(alpha)
-            else:
-                self.dash_trails.remove(trail)
+        self.dash_trails = [trail for trail in self.dash_trails if trail['lifetime'] > 0]
                 
     def draw_dash_trails(self, camera_x, camera_y):
         for trail in self.dash_trails:
-            screen.blit(trail['sprite'], 
+            sprite = trail['sprites'].trail(trail['index'], trail['facing_right'], trail['lifetime'])
+            screen.blit(sprite, 
                        (trail['x'] - camera_x, 
                         trail['y'] - camera_y))
     
-    def check_dash_collision_with_enemies(self, enemies):
+    def check_dash_collision_with_enemies(self, enemy_grid):
         if not self.is_dashing:
             return
             
         dash_damage = 150
         
-        for enemy in enemies:
-            if enemy.alive and self.rect.colliderect(enemy.rect):
+        for enemy in enemy_grid.query_rect(self.rect):
+            if enemy.alive:
                 if enemy.take_damage(dash_damage):
                     if hasattr(enemy, 'score_value'):
                         score[0] += enemy.score_value
@@ -754,30 +1455,20 @@ class Player:
                 enemy.vx += (dx / length) * push_force
                 enemy.vy += (dy / length) * push_force * 0.5
                 
-    def create_blood_effect(self, x, y, count):
-        for _ in range(count):
-            angle = random.uniform(0, math.pi * 2)
-            speed = random.uniform(3, 10)
-            size = random.randint(3, 7)
-            lifetime = random.uniform(20, 40)
-            
-            blood_colors = [(200, 0, 0), (180, 0, 0), (160, 0, 0), (140, 0, 0)]
-            color = random.choice(blood_colors)
+    def clip_dash_step(self, step_x, step_y):
+        hit = platform_grid.sweep_rect(self.rect, step_x, step_y)
+        if hit is None or hit[1] is None:
+            return step_x, step_y
             
-            effect_manager.add_effect(
-                x, y, 'bullet_impact',
-                count=1
-            )
-            
-            if effect_manager.effects:
-                last_effect = effect_manager.effects[-1]
-                if last_effect.particles:
-                    last_effect.particles[0]['color'] = color
-                    last_effect.particles[0]['size'] = size
-                    last_effect.particles[0]['vx'] = math.cos(angle) * speed
-                    last_effect.particles[0]['vy'] = math.sin(angle) * speed
-                    last_effect.particles[0]['lifetime'] = lifetime
-                    last_effect.particles[0]['max_lifetime'] = lifetime
+        contact_x = int(step_x * hit[0])
+        contact_y = int(step_y * hit[0])
+        self.rect.x += contact_x
+        self.rect.y += contact_y
+        
+        return step_x - contact_x, step_y - contact_y
+    
+    def create_blood_effect(self, x, y, count):
+        effect_manager.add_effect(x, y, 'blood', count=count, gravity=True)
         effect_manager.add_effect(x, y, 'blood', count=count)
     
     def update_dash(self):
@@ -871,8 +1562,7 @@ class Player:
             self.vx = self.dash_direction[0] * self.dash_speed
             self.vy = self.dash_direction[1] * self.dash_speed
             
-            all_enemies = enemy_spawner.ground_enemies + enemy_spawner.flying_enemies
-            self.check_dash_collision_with_enemies(all_enemies)
+            self.check_dash_collision_with_enemies(enemy_spawner.grid)
         else:
             scaled_dt = dt * self.time_scale
             target_speed = 0
@@ -904,10 +1594,16 @@ class Player:
             if abs(self.vx) < 0.1:
                 self.vx = 0
 
-        self.rect.x += self.vx * (dt * self.time_scale if not self.is_dashing else 1)
+        step_x = self.vx * (dt * self.time_scale if not self.is_dashing else 1)
+        step_y = self.vy
+        dashing = self.is_dashing
+        if dashing:
+            step_x, step_y = self.clip_dash_step(step_x, step_y)
+            
+        self.rect.x += step_x
         self.on_wall = False
         self.wall_dir = 0
-        for plat in platforms:
+        for plat in platform_grid.query_rect(self.rect):
             if self.rect.colliderect(plat):
                 if self.vx > 0:
                     self.rect.right = plat.left
@@ -930,11 +1626,13 @@ class Player:
             self.vy += GRAVITY * dt * self.time_scale
             if self.on_wall and self.wall_jump_used:
                 self.vy *= 0.7
+            if not dashing:
+                step_y = self.vy * dt * self.time_scale
                 
-        self.rect.y += self.vy * (dt * self.time_scale if not self.is_dashing else 1)
+        self.rect.y += step_y
         self.on_ground = False
 
-        for plat in platforms:
+        for plat in platform_grid.query_rect(self.rect):
             if self.rect.colliderect(plat):
                 if self.vy > 0:
                     self.rect.bottom = plat.top
@@ -1049,38 +1747,26 @@ class Player:
                 return True
         return False
     
-    def draw(self, camera_x, camera_y):
+    def draw(self, camera_x, camera_y, alpha=1.0):
         if not self.alive:
             return
             
         self.draw_dash_trails(camera_x, camera_y)
+        
+        offset_x, offset_y = interpolation_offset(self, self.rect.x, self.rect.y, alpha)
+        camera_x += offset_x
+        camera_y += offset_y
             
-        if self.is_jumping:
-            current_image = self.jump_sprites[self.current_jump_sprite]
+        faded = self.is_invulnerable and pygame.time.get_ticks() % 200 < 100
             
-            if not self.facing_right:
-                current_image = pygame.transform.flip(current_image, True, False)
+        if self.is_jumping:
+            current_image = self.jump_sprites.get(self.current_jump_sprite, self.facing_right, faded)
             
             y_offset = self.rect.y - (85 - 60)
             
-            if self.is_invulnerable and pygame.time.get_ticks() % 200 < 100:
-                current_image = current_image.copy()
-                alpha_surface = pygame.Surface(current_image.get_size(), pygame.SRCALPHA)
-                alpha_surface.fill((255, 255, 255, 128))
-                current_image.blit(alpha_surface, (0, 0), special_flags=pygame.BLEND_RGBA_MULT)
-            
             screen.blit(current_image, (self.rect.x - camera_x, y_offset - camera_y))
         else:
-            current_image = self.sprites[self.current_sprite]
-            
-            if not self.facing_right:
-                current_image = pygame.transform.flip(current_image, True, False)
-            
-            if self.is_invulnerable and pygame.time.get_ticks() % 200 < 100:
-                current_image = current_image.copy()
-                alpha_surface = pygame.Surface(current_image.get_size(), pygame.SRCALPHA)
-                alpha_surface.fill((255, 255, 255, 128))
-                current_image.blit(alpha_surface, (0, 0), special_flags=pygame.BLEND_RGBA_MULT)
+            current_image = self.sprites.get(self.current_sprite, self.facing_right, faded)
             
             screen.blit(current_image, (self.rect.x - camera_x, self.rect.y - camera_y))
 
@@ -1098,21 +1784,15 @@ class FlyingEnemy:
         self.alive = True
         self.avoid_timer = 0
         
-        self.animation_sheet = pygame.image.load("images/enemy_fly.png").convert_alpha()
         self.sprite_width = 80
         self.sprite_height = 40
         self.sprite_count = 4
-        self.sprites = []
+        self.sprites = assets.sprite_set("images/enemy_fly.png", self.sprite_width, self.sprite_height,
+                                     self.sprite_count, flip=True)
         self.current_sprite = 0
         self.animation_speed = 0.2
         self.animation_timer = 0
         self.facing_right = True
-        
-        for i in range(self.sprite_count):
-            sprite_rect = pygame.Rect(i * self.sprite_width, 0, self.sprite_width, self.sprite_height)
-            sprite = self.animation_sheet.subsurface(sprite_rect)
-            sprite = pygame.transform.flip(sprite, True, False)
-            self.sprites.append(sprite)
             
     def update_animation(self, dt):
         if not self.alive:
@@ -1177,14 +1857,13 @@ class FlyingEnemy:
         
         for point_x, point_y in check_points:
             check_rect = pygame.Rect(point_x - 20, point_y - 20, 40, 40)
-            for plat in platforms:
-                if check_rect.colliderect(plat):
-                    dx_avoid = self.rect.centerx - plat.centerx
-                    dy_avoid = self.rect.centery - plat.centery
-                    avoid_length = max(math.sqrt(dx_avoid*dx_avoid + dy_avoid*dy_avoid), 0.1)
-                    avoid_x += dx_avoid / avoid_length * 0.5
-                    avoid_y += dy_avoid / avoid_length * 0.5
-                    self.avoid_timer = 10
+            for plat in platform_grid.collide_rect(check_rect):
+                dx_avoid = self.rect.centerx - plat.centerx
+                dy_avoid = self.rect.centery - plat.centery
+                avoid_length = max(math.sqrt(dx_avoid*dx_avoid + dy_avoid*dy_avoid), 0.1)
+                avoid_x += dx_avoid / avoid_length * 0.5
+                avoid_y += dy_avoid / avoid_length * 0.5
+                self.avoid_timer = 10
         
         if self.avoid_timer > 0:
             avoid_x += random.uniform(-0.5, 0.5)
@@ -1193,7 +1872,7 @@ class FlyingEnemy:
         return avoid_x, avoid_y
         
     def handle_collisions(self):
-        for plat in platforms:
+        for plat in platform_grid.query_rect(self.rect):
             if self.rect.colliderect(plat):
                 dx_collision = self.rect.centerx - plat.centerx
                 dy_collision = self.rect.centery - plat.centery
@@ -1222,10 +1901,7 @@ class FlyingEnemy:
         if not self.alive:
             return
             
-        current_image = self.sprites[self.current_sprite]
-        
-        if not self.facing_right:
-            current_image = pygame.transform.flip(current_image, True, False)
+        current_image = self.sprites.get(self.current_sprite, self.facing_right)
         
         screen.blit(current_image, (self.rect.x - camera_x, self.rect.y - camera_y))
         
@@ -1239,7 +1915,7 @@ class GroundEnemy:
     def __init__(self, x, y, platform):
         self.rect = pygame.Rect(x, y, 40, 80)
         self.platform = platform
-        self.platform_group = self.find_platform_group(platform)
+        self.platform_group = platform_grid.group_of(platform)
         self.vx = 2.0
         self.vy = 0.0
         self.health = 100
@@ -1260,21 +1936,15 @@ class GroundEnemy:
         self.attack_range = 800
         self.pursuit_range = 1000
         
-        self.animation_sheet = pygame.image.load("images/enemy_ground.png").convert_alpha()
         self.sprite_width = 40
         self.sprite_height = 80
         self.sprite_count = 4
-        self.sprites = []
+        self.sprites = assets.sprite_set("images/enemy_ground.png", self.sprite_width, self.sprite_height,
+                                     self.sprite_count, flip=True)
         self.current_sprite = 0
         self.animation_speed = 0.15
         self.animation_timer = 0
         self.facing_right = True
-        
-        for i in range(self.sprite_count):
-            sprite_rect = pygame.Rect(i * self.sprite_width, 0, self.sprite_width, self.sprite_height)
-            sprite = self.animation_sheet.subsurface(sprite_rect)
-            sprite = pygame.transform.flip(sprite, True, False)
-            self.sprites.append(sprite)
             
     def update_animation(self, dt):
         if not self.alive:
@@ -1292,37 +1962,11 @@ class GroundEnemy:
         if abs(self.vx) > 0.1:
             self.facing_right = self.vx > 0
     
-    def find_platform_group(self, start_platform):
-        visited = []
-        stack = [start_platform]
-        platform_group = []
-        
-        while stack:
-            current = stack.pop()
-            if current in visited:
-                continue
-                
-            visited.append(current)
-            platform_group.append(current)
-            
-            for plat in platforms:
-                if plat not in visited:
-                    if (abs(current.top - plat.top) < 10 and 
-                        ((current.right >= plat.left - 5 and current.right <= plat.left + 5) or
-                         (current.left >= plat.right - 5 and current.left <= plat.right + 5))):
-                        stack.append(plat)
-        
-        return platform_group
-    
     def get_platform_bounds(self):
-        if not self.platform_group:
-            return self.platform
+        if self.platform_group is None:
+            return self.platform.copy()
             
-        left = min(plat.left for plat in self.platform_group)
-        right = max(plat.right for plat in self.platform_group)
-        top = min(plat.top for plat in self.platform_group)
-        
-        return pygame.Rect(left, top, right - left, self.platform.height)
+        return platform_grid.group_bounds[self.platform_group].copy()
     
     def update(self, player):
         if not self.alive or not player.alive:
@@ -1332,7 +1976,6 @@ class GroundEnemy:
         if self.vy > 10:
             self.vy = 10
             
-        self.platform_group = self.find_platform_group(self.platform)
         platform_bounds = self.get_platform_bounds()
         
         self.last_player_x = player.rect.centerx
@@ -1376,8 +2019,8 @@ class GroundEnemy:
         
         self.rect.x += self.vx
         
-        for plat in platforms:
-            if self.rect.colliderect(plat) and plat not in self.platform_group:
+        for plat in platform_grid.query_rect(self.rect):
+            if self.rect.colliderect(plat) and platform_grid.group_of(plat) != self.platform_group:
                 if self.vx > 0:
                     self.rect.right = plat.left
                     if self.is_charging:
@@ -1418,7 +2061,7 @@ class GroundEnemy:
         self.rect.y += self.vy
         self.on_ground = False
         
-        for plat in platforms:
+        for plat in platform_grid.query_rect(self.rect):
             if self.rect.colliderect(plat):
                 if self.vy > 0:
                     self.rect.bottom = plat.top
@@ -1426,7 +2069,7 @@ class GroundEnemy:
                     self.on_ground = True
                     if plat != self.platform:
                         self.platform = plat
-                        self.platform_group = self.find_platform_group(plat)
+                        self.platform_group = platform_grid.group_of(plat)
                     break
                 elif self.vy < 0:
                     self.rect.top = plat.bottom
@@ -1459,15 +2102,14 @@ class GroundEnemy:
             
         player_direction = 1 if dx > 0 else -1
         
-        player_platform_group = self.find_platform_group(player_platform)
-        
-        if any(plat in player_platform_group for plat in self.platform_group):
+        if platform_grid.group_of(player_platform) == self.platform_group:
             return True, player_direction
             
         return False, 0
     
     def find_player_platform(self, player):
-        for plat in platforms:
+        search_rect = pygame.Rect(player.rect.centerx - 1, player.rect.bottom - 19, 2, 39)
+        for plat in platform_grid.query_rect(search_rect):
             if (abs(player.rect.bottom - plat.top) < 20 and 
                 plat.left <= player.rect.centerx <= plat.right):
                 return plat
@@ -1484,10 +2126,7 @@ class GroundEnemy:
         if not self.alive:
             return
             
-        current_image = self.sprites[self.current_sprite]
-        
-        if not self.facing_right:
-            current_image = pygame.transform.flip(current_image, True, False)
+        current_image = self.sprites.get(self.current_sprite, self.facing_right)
         
         screen.blit(current_image, (self.rect.x - camera_x, self.rect.y - camera_y))
         
@@ -1497,10 +2136,63 @@ class GroundEnemy:
         pygame.draw.rect(screen, GREEN, (self.rect.x - camera_x, self.rect.y - camera_y - 10, 
                                        health_width, 5))
 
+class EnemyGrid:
+    def __init__(self, cell_size=ENEMY_CELL_SIZE):
+        self.cell_size = cell_size
+        self.cells = {}
+        self.enemies = []
+        self.keys = None
+        
+    def rebuild(self, enemies):
+        size = self.cell_size
+        cells = self.cells
+        cells.clear()
+        self.enemies = enemies
+        self.keys = None
+        
+        for order, enemy in enumerate(enemies):
+            rect = enemy.rect
+            for row in range(rect.top // size, (rect.bottom - 1) // size + 1):
+                for col in range(rect.left // size, (rect.right - 1) // size + 1):
+                    bucket = cells.get((col, row))
+                    if bucket is None:
+                        cells[(col, row)] = [order]
+                    else:
+                        bucket.append(order)
+                        
+    def candidates(self, rect):
+        size = self.cell_size
+        cells = self.cells
+        found = set()
+        for row in range(rect.top // size, (rect.bottom - 1) // size + 1):
+            for col in range(rect.left // size, (rect.right - 1) // size + 1):
+                bucket = cells.get((col, row))
+                if bucket is not None:
+                    found.update(bucket)
+        return found
+        
+    def occupied(self, cols, rows):
+        if self.keys is None:
+            self.keys = np.array([col * ENEMY_CELL_KEY + row for col, row in self.cells], dtype=np.int64)
+        return np.isin(cols * ENEMY_CELL_KEY + rows, self.keys)
+        
+    def query_rect(self, rect):
+        enemies = self.enemies
+        return [enemies[order] for order in sorted(self.candidates(rect)) if rect.colliderect(enemies[order].rect)]
+        
+    def first_hit(self, rect):
+        enemies = self.enemies
+        best = None
+        for order in self.candidates(rect):
+            if (best is None or order < best) and rect.colliderect(enemies[order].rect):
+                best = order
+        return None if best is None else enemies[best]
+
 class EnemySpawner:
     def __init__(self):
         self.ground_enemies = []
         self.flying_enemies = []
+        self.grid = EnemyGrid()
         self.ground_spawn_timer = 0
         self.ground_spawn_interval = 2 * FPS
         self.max_ground_enemies_per_platform = 2
@@ -1521,25 +2213,14 @@ class EnemySpawner:
         check_height = 200
         check_rect = pygame.Rect(platform_mid_x - 10, platform_top - check_height, 20, check_height)
         
-        for plat in platforms:
-            if plat != platform and check_rect.colliderect(plat):
-                return False
-        
-        has_left_platform = False
-        has_right_platform = False
+        if platform_grid.any_collision(check_rect, exclude=platform):
+            return False
         
         left_check_rect = pygame.Rect(platform.left - BLOCK_SIZE - 5, platform.top, 10, platform.height)
         right_check_rect = pygame.Rect(platform.right + 5, platform.top, 10, platform.height)
         
-        for plat in platforms:
-            if plat != platform:
-                if left_check_rect.colliderect(plat):
-                    has_left_platform = True
-                if right_check_rect.colliderect(plat):
-                    has_right_platform = True
-                
-                if has_left_platform and has_right_platform:
-                    break
+        has_left_platform = platform_grid.any_collision(left_check_rect, exclude=platform)
+        has_right_platform = platform_grid.any_collision(right_check_rect, exclude=platform)
         
         return has_left_platform and has_right_platform
 
@@ -1568,11 +2249,16 @@ class EnemySpawner:
         for enemy in self.flying_enemies:
             enemy.update(player)
             
-        for enemy in self.ground_enemies + self.flying_enemies:
-            if enemy.alive and player.rect.colliderect(enemy.rect):
+        self.reindex()
+        
+        for enemy in self.grid.query_rect(player.rect):
+            if enemy.alive:
                 player.take_damage()
                 break
     
+    def reindex(self):
+        self.grid.rebuild(self.ground_enemies + self.flying_enemies)
+    
     def is_too_close_to_player(self, x, y, player):
         if not player.alive:
             return False
@@ -1620,14 +2306,10 @@ class EnemySpawner:
             
             spawn_rect = pygame.Rect(x, y, 80, 40)
             
-            collision = False
-            for plat in platforms:
-                if spawn_rect.colliderect(plat):
-                    collision = True
-                    break
+            collision = platform_grid.any_collision(spawn_rect)
                     
-            for enemy in self.flying_enemies:
-                if enemy.alive and spawn_rect.colliderect(enemy.rect):
+            for enemy in self.grid.query_rect(spawn_rect):
+                if enemy.alive and isinstance(enemy, FlyingEnemy):
                     collision = True
                     break
                     
@@ -1640,138 +2322,212 @@ class EnemySpawner:
                 
             attempts += 1
     
-    def draw(self, camera_x, camera_y):
-        for enemy in self.ground_enemies:
-            enemy.draw(camera_x, camera_y)
-            
-        for enemy in self.flying_enemies:
-            enemy.draw(camera_x, camera_y)
+    def store_previous_positions(self):
+        for enemy in self.grid.enemies:
+            store_previous_position(enemy, enemy.rect.x, enemy.rect.y)
+    
+    def draw(self, camera_x, camera_y, alpha=1.0):
+        for enemy in self.grid.enemies:
+            offset_x, offset_y = interpolation_offset(enemy, enemy.rect.x, enemy.rect.y, alpha)
+            enemy.draw(camera_x + offset_x, camera_y + offset_y)
 
-class Bullet:
-    def __init__(self, x, y, direction, weapon_type):
-        self.x = x
-        self.y = y
-        self.direction = direction
-        self.weapon_type = weapon_type
-        self.damage = 15
-        self.initial_damage = 15
-        
-        self.lifetime = 0
-        self.slowdown_start = 60
-        self.damage_reduction_start = 90
-        self.is_slowing_down = False
+MAX_BULLETS = 4096
+BULLET_DAMAGE = 15
+BULLET_SLOWDOWN_START = 60
+BULLET_DAMAGE_DECAY_START = 90
+BULLET_TIPS = ('right', 'left', 'down', 'up')
+
+B_X, B_Y, B_DX, B_DY, B_DAMAGE, B_LIFE, B_TYPE, B_TIP, B_PREV_X, B_PREV_Y = range(10)
+BULLET_FIELDS = 10
+
+def pixel_round(values):
+    return np.trunc(values + np.copysign(0.5, values)).astype(np.int64)
+
+def boxes_touch(grid, left, top, right, bottom):
+    size = grid.cell_size
+    col0, col1 = (left // size).astype(np.int64), (right // size).astype(np.int64)
+    row0, row1 = (top // size).astype(np.int64), (bottom // size).astype(np.int64)
+    corners = grid.occupied(np.concatenate((col0, col1, col0, col1)), np.concatenate((row0, row0, row1, row1)))
+    return corners.reshape(4, -1).any(axis=0) | (col1 - col0 > 1) | (row1 - row0 > 1)
+
+class BulletPool:
+    def __init__(self, capacity=MAX_BULLETS):
+        self.capacity = capacity
+        self.data = np.zeros((BULLET_FIELDS, capacity))
+        self.count = 0
+        self.rng = np.random.default_rng()
+        
+    def seed(self, seed):
+        self.rng = np.random.default_rng(seed)
+        
+    def clear(self):
+        self.count = 0
+        
+    def emit(self, x, y, direction_x, direction_y, weapon_type):
+        n = min(len(direction_x), self.capacity)
+        overflow = self.count + n - self.capacity
+        if overflow > 0:
+            self.data[:, :self.count - overflow] = self.data[:, overflow:self.count]
+            self.count -= overflow
+            
+        direction_x = direction_x[:n]
+        direction_y = direction_y[:n]
+        speed = 15.0 if weapon_type == 1 else 30.0
+        
+        block = self.data[:, self.count:self.count + n]
+        block[B_X] = x
+        block[B_Y] = y
+        block[B_DX] = direction_x * speed
+        block[B_DY] = direction_y * speed
+        block[B_DAMAGE] = BULLET_DAMAGE
+        block[B_LIFE] = 0
+        block[B_TYPE] = weapon_type
+        block[B_TIP] = np.select([direction_x > 0, direction_x < 0, direction_y > 0], [0, 1, 2], 3)
+        block[B_PREV_X] = x
+        block[B_PREV_Y] = y
+        self.count += n
+        
+    def bounds(self):
+        live = self.data[:, :self.count]
+        shotgun = live[B_TYPE] == 1
+        width = np.where(shotgun, SHOTGUN_BULLET_SIZE[0], RIFLE_BULLET_SIZE[0])
+        height = np.where(shotgun, SHOTGUN_BULLET_SIZE[1], RIFLE_BULLET_SIZE[1])
+        left = pixel_round(live[B_X] - width // 2)
+        top = pixel_round(live[B_Y] - height // 2)
+        return left, top, width, height
+        
+    def advance(self, camera_x, camera_y, time_scale):
+        n = self.count
+        live = self.data[:, :n]
+        
+        life = live[B_LIFE]
+        life += 1
+        starting = life == BULLET_SLOWDOWN_START
+        live[B_DX, starting] *= 0.98
+        live[B_DY, starting] *= 0.95
+        
+        slowing = life >= BULLET_SLOWDOWN_START
+        live[B_DX, slowing] *= 0.98
+        live[B_DY, slowing] *= 0.98
+        live[B_DY, slowing] += 0.2
+        
+        live[B_DAMAGE, life >= BULLET_DAMAGE_DECAY_START] *= 0.9
+        
+        step_x = live[B_DX] * time_scale
+        step_y = live[B_DY] * time_scale
+        left, top, width, height = self.bounds()
+        near = boxes_touch(platform_grid,
+                           left + np.minimum(step_x, 0), top + np.minimum(step_y, 0),
+                           left + width + np.maximum(step_x, 0), top + height + np.maximum(step_y, 0))
+        
+        hit = np.zeros(n, dtype=bool)
+        for i in np.flatnonzero(near).tolist():
+            rect = pygame.Rect(int(left[i]), int(top[i]), int(width[i]), int(height[i]))
+            contact = platform_grid.sweep_rect(rect, float(step_x[i]), float(step_y[i]))
+            if contact is not None:
+                hit[i] = True
+                step_x[i] *= contact[0]
+                step_y[i] *= contact[0]
+                
+        live[B_X] += step_x
+        live[B_Y] += step_y
+        left, top, width, height = self.bounds()
         
-        if weapon_type == 1:
-            self.speed = 15.0
-            self.width = 18
-            self.height = 6
-        else:
-            self.speed = 30.0
-            self.width = 12
-            self.height = 4
+        if hit.any():
+            effect_manager.add_effect(
+                (left + width // 2)[hit],
+                (top + height // 2)[hit],
+                'bullet_impact',
+                count=np.where(live[B_TYPE, hit] == 1, 8, 12)
+            )
             
-        self.dx = direction[0] * self.speed
-        self.dy = direction[1] * self.speed
-        self.initial_dx = self.dx
-        self.initial_dy = self.dy
-        
-        self.rect = pygame.Rect(x - self.width//2, y - self.height//2, self.width, self.height)
-        
-    def update(self, camera_x, camera_y, time_scale):
-        self.lifetime += 1
-        
-        if self.lifetime >= self.slowdown_start and not self.is_slowing_down:
-            self.is_slowing_down = True
-            self.dx *= 0.98
-            self.dy *= 0.95
+        off_screen = ((left + width < camera_x) | (left > camera_x + SCREEN_WIDTH) |
+                      (top + height < camera_y) | (top > camera_y + SCREEN_HEIGHT))
+        return ~(hit | off_screen)
         
-        if self.is_slowing_down:
-            self.dx *= 0.98
-            self.dy *= 0.98
-            self.dy += 0.2
+    def compact(self, alive):
+        if not alive.all():
+            keep = np.flatnonzero(alive)
+            self.data[:, :len(keep)] = self.data[:, keep]
+            self.count = len(keep)
             
-        if self.lifetime >= self.damage_reduction_start:
-            self.damage = max(0, self.damage * 0.9)
+    def store_previous_positions(self):
+        n = self.count
+        self.data[B_PREV_X:B_PREV_Y + 1, :n] = self.data[B_X:B_Y + 1, :n]
         
-        self.x += self.dx * time_scale
-        self.y += self.dy * time_scale
-        
-        self.rect.x = self.x - self.width//2
-        self.rect.y = self.y - self.height//2
-        
-        for plat in platforms:
-            if self.rect.colliderect(plat):
-                effect_manager.add_effect(
-                    self.rect.centerx,
-                    self.rect.centery,
-                    'bullet_impact',
-                    count=8 if self.weapon_type == 1 else 12
-                )
-                return False
-                
-        screen_left = camera_x
-        screen_right = camera_x + SCREEN_WIDTH
-        screen_top = camera_y
-        screen_bottom = camera_y + SCREEN_HEIGHT
-        
-        if (self.rect.right < screen_left or self.rect.left > screen_right or 
-            self.rect.bottom < screen_top or self.rect.top > screen_bottom):
-            return False
+    def draw(self, camera_x, camera_y, alpha=1.0):
+        n = self.count
+        if n == 0:
+            return
             
-        return True
+        live = self.data[:, :n]
+        center_x = live[B_X] - camera_x - (live[B_X] - live[B_PREV_X]) * (1.0 - alpha)
+        center_y = live[B_Y] - camera_y - (live[B_Y] - live[B_PREV_Y]) * (1.0 - alpha)
         
-    def draw(self, camera_x, camera_y):
-        angle = math.atan2(self.dy, self.dx)
-        angle_degrees = math.degrees(angle)
+        angle_index = bullet_sprites.angle_index(live[B_DX], live[B_DY])
         
-        if self.weapon_type == 1:
-            bullet_surface = pygame.Surface((self.width, self.height), pygame.SRCALPHA)
-            pygame.draw.ellipse(bullet_surface, BLACK, (0, 0, self.width, self.height))
-            
-            glow_surface = pygame.Surface((self.width + 4, self.height + 4), pygame.SRCALPHA)
-            pygame.draw.ellipse(glow_surface, (100, 100, 100, 100), (0, 0, self.width + 4, self.height + 4))
-            
-            rotated_glow = pygame.transform.rotate(glow_surface, -angle_degrees)
-            rotated_bullet = pygame.transform.rotate(bullet_surface, -angle_degrees)
-            
-            glow_rect = rotated_glow.get_rect(center=(self.x - camera_x, self.y - camera_y))
-            bullet_rect = rotated_bullet.get_rect(center=(self.x - camera_x, self.y - camera_y))
-            
-            screen.blit(rotated_glow, glow_rect)
-            screen.blit(rotated_bullet, bullet_rect)
-            
-        else:
-            bullet_surface = pygame.Surface((self.width, self.height), pygame.SRCALPHA)
-            pygame.draw.rect(bullet_surface, BLACK, (0, 0, self.width, self.height))
-            
-            tip_color = (255, 0, 0)
-            if self.direction[0] > 0:
-                pygame.draw.rect(bullet_surface, tip_color, (self.width - 3, 0, 3, self.height))
-            elif self.direction[0] < 0:
-                pygame.draw.rect(bullet_surface, tip_color, (0, 0, 3, self.height))
-            elif self.direction[1] > 0:
-                pygame.draw.rect(bullet_surface, tip_color, (0, self.height - 3, self.width, 3))
+        rifle = [bullet_sprites.rifle[tip] for tip in BULLET_TIPS]
+        blits = []
+        for x, y, weapon_type, tip, index in zip(center_x.tolist(), center_y.tolist(),
+                                                 live[B_TYPE].tolist(), live[B_TIP].astype(np.int64).tolist(),
+                                                 angle_index.tolist()):
+            if weapon_type == 1:
+                glow, half_w, half_h = bullet_sprites.glow[index]
+                blits.append((glow, (x - half_w, y - half_h)))
+                bullet, half_w, half_h = bullet_sprites.shotgun[index]
             else:
-                pygame.draw.rect(bullet_surface, tip_color, (0, 0, self.width, 3))
+                bullet, half_w, half_h = rifle[tip][index]
+            blits.append((bullet, (x - half_w, y - half_h)))
             
-            rotated_bullet = pygame.transform.rotate(bullet_surface, -angle_degrees)
-            bullet_rect = rotated_bullet.get_rect(center=(self.x - camera_x, self.y - camera_y))
-            
-            screen.blit(rotated_bullet, bullet_rect)
+        screen.blits(blits, doreturn=False)
+
+class BulletSpriteCache:
+    def __init__(self, angle_steps=BULLET_ANGLE_STEPS):
+        self.angle_steps = angle_steps
+        
+        width, height = SHOTGUN_BULLET_SIZE
+        bullet_surface = pygame.Surface((width, height), pygame.SRCALPHA)
+        pygame.draw.ellipse(bullet_surface, BLACK, (0, 0, width, height))
+        
+        glow_surface = pygame.Surface((width + 4, height + 4), pygame.SRCALPHA)
+        pygame.draw.ellipse(glow_surface, (100, 100, 100, 100), (0, 0, width + 4, height + 4))
+        
+        self.shotgun = self.rotations(bullet_surface)
+        self.glow = self.rotations(glow_surface)
+        
+        width, height = RIFLE_BULLET_SIZE
+        tip_color = (255, 0, 0)
+        tip_rects = {
+            'right': (width - 3, 0, 3, height),
+            'left': (0, 0, 3, height),
+            'down': (0, height - 3, width, 3),
+            'up': (0, 0, width, 3)
+        }
+        
+        self.rifle = {}
+        for tip, tip_rect in tip_rects.items():
+            bullet_surface = pygame.Surface((width, height), pygame.SRCALPHA)
+            pygame.draw.rect(bullet_surface, BLACK, (0, 0, width, height))
+            pygame.draw.rect(bullet_surface, tip_color, tip_rect)
+            self.rifle[tip] = self.rotations(bullet_surface)
+    
+    def rotations(self, surface):
+        rotated = []
+        for i in range(self.angle_steps):
+            sprite = pygame.transform.rotate(surface, -i * 360 / self.angle_steps)
+            rotated.append((sprite, sprite.get_width() // 2, sprite.get_height() // 2))
+        return rotated
+    
+    def angle_index(self, dx, dy):
+        return np.round(np.arctan2(dy, dx) * self.angle_steps / (2 * math.pi)).astype(np.int64) % self.angle_steps
 
 class Weapon:
     def __init__(self, x, y, weapon_type, is_front):
         self.weapon_type = weapon_type
         self.is_front = is_front
         self.sheet_name = f"images/{weapon_type}{'l' if is_front else 'r'}.png"
-        self.sheet = pygame.image.load(self.sheet_name).convert_alpha()
         self.sprite_size = 128
-        self.sprites = []
-        
-        for i in range(5):
-            sprite_rect = pygame.Rect(i * self.sprite_size, 0, self.sprite_size, self.sprite_size)
-            sprite = self.sheet.subsurface(sprite_rect)
-            self.sprites.append(sprite)
+        self.sprites = assets.sprite_set(self.sheet_name, self.sprite_size, self.sprite_size, 5)
             
         self.current_sprite = 2
         self.rect = pygame.Rect(x - 64, y - 64, self.sprite_size, self.sprite_size)
@@ -1780,12 +2536,7 @@ class Weapon:
         if self.weapon_type != weapon_type:
             self.weapon_type = weapon_type
             self.sheet_name = f"images/{weapon_type}{'l' if is_front else 'r'}.png"
-            self.sheet = pygame.image.load(self.sheet_name).convert_alpha()
-            self.sprites = []
-            for i in range(5):
-                sprite_rect = pygame.Rect(i * self.sprite_size, 0, self.sprite_size, self.sprite_size)
-                sprite = self.sheet.subsurface(sprite_rect)
-                self.sprites.append(sprite)
+            self.sprites = assets.sprite_set(self.sheet_name, self.sprite_size, self.sprite_size, 5)
     
     def update_position(self, player_x, player_y, angle, facing_right):
         self.rect.centerx = player_x
@@ -1813,16 +2564,7 @@ class Weapon:
             self.current_sprite = 2
     
     def draw(self, camera_x, camera_y, facing_right):
-        current_sprite = self.sprites[self.current_sprite]
-        
-        flip_x = False
-        if not facing_right and self.current_sprite in [0, 1, 2, 3, 4]:
-            flip_x = True
-        elif facing_right and self.current_sprite in [1, 3] and self.current_sprite == 1:
-            flip_x = False
-        
-        if flip_x:
-            current_sprite = pygame.transform.flip(current_sprite, True, False)
+        current_sprite = self.sprites.get(self.current_sprite, facing_right)
         
         screen.blit(current_sprite, (self.rect.x - camera_x, self.rect.y - camera_y))
 
@@ -1831,7 +2573,7 @@ class Mouseusing:
         self.leftweapon, self.rightweapon = 1, 1
         self.front_weapon = None
         self.back_weapon = None
-        self.bullets = []
+        self.bullets = bullet_pool
         
         self.shot_count = 0
         self.cooldown_timer = 0
@@ -1950,36 +2692,19 @@ class Mouseusing:
         return directions[sector]
     
     def shoot(self, player_x, player_y, target_angle, weapon_type):
-        main_direction = self.get_direction_from_angle(target_angle)
+        main_x, main_y = self.get_direction_from_angle(target_angle)
         
         if weapon_type == 1:
-            bullet_count = 16
+            bullet_count, spread = 16, 0.3
         else:
-            bullet_count = 8
-            
-        for i in range(bullet_count):
-            if weapon_type == 1:
-                direction_variation = (
-                    main_direction[0] + random.uniform(-0.3, 0.3),
-                    main_direction[1] + random.uniform(-0.3, 0.3)
-                )
-                length = math.sqrt(direction_variation[0]**2 + direction_variation[1]**2)
-                if length > 0:
-                    direction = (direction_variation[0]/length, direction_variation[1]/length)
-                else:
-                    direction = main_direction
-            else:
-                direction_variation = (
-                    main_direction[0] + random.uniform(-0.05, 0.05),
-                    main_direction[1] + random.uniform(-0.05, 0.05)
-                )
-                length = math.sqrt(direction_variation[0]**2 + direction_variation[1]**2)
-                if length > 0:
-                    direction = (direction_variation[0]/length, direction_variation[1]/length)
-                else:
-                    direction = main_direction
+            bullet_count, spread = 8, 0.05
             
-            self.bullets.append(Bullet(player_x, player_y, direction, weapon_type))
+        offsets = self.bullets.rng.uniform(-spread, spread, (2, bullet_count))
+        direction_x = main_x + offsets[0]
+        direction_y = main_y + offsets[1]
+        length = np.hypot(direction_x, direction_y)
+        
+        self.bullets.emit(player_x, player_y, direction_x / length, direction_y / length, weapon_type)
     
     def update_cooldown(self):
         if self.l_cooldown_active:
@@ -2000,47 +2725,45 @@ class Mouseusing:
                 self.l_shot_count = 0
                 self.r_shot_count = 0
     
-    def update_bullets(self, camera_x, camera_y, enemies, score):
+    def update_bullets(self, camera_x, camera_y, enemy_grid, score):
         time_scale = 1.0
         
-        bullets_to_remove = []
-        enemies_to_remove = []
+        bullets = self.bullets
+        if bullets.count == 0:
+            return
+            
+        alive = bullets.advance(camera_x, camera_y, time_scale)
+        left, top, width, height = bullets.bounds()
+        near = alive & boxes_touch(enemy_grid, left, top, left + width - 1, top + height - 1)
         
-        for i, bullet in enumerate(self.bullets):
-            if not bullet.update(camera_x, camera_y, time_scale):
-                bullets_to_remove.append(i)
+        for i in np.flatnonzero(near).tolist():
+            rect = pygame.Rect(int(left[i]), int(top[i]), int(width[i]), int(height[i]))
+            enemy = enemy_grid.first_hit(rect)
+            if enemy is None:
                 continue
                 
-            for j, enemy in enumerate(enemies):
-                if bullet.rect.colliderect(enemy.rect):
-                    effect_manager.add_effect(
-                        bullet.rect.centerx,
-                        bullet.rect.centery,
-                        'bullet_impact',
-                        count=10 if bullet.weapon_type == 1 else 15
-                    )
-                    
-                    if enemy.take_damage(bullet.damage):
-                        enemies_to_remove.append(j)
-                        score[0] += enemy.score_value
-                        
-                        if isinstance(enemy, GroundEnemy):
-                            enemy_spawner.last_ground_enemy_hp = int(enemy_spawner.last_ground_enemy_hp * 1.05)
-                            print(f"GroundEnemy HP increased to: {enemy_spawner.last_ground_enemy_hp}")
-                        elif isinstance(enemy, FlyingEnemy):
-                            enemy_spawner.last_flying_enemy_hp = int(enemy_spawner.last_flying_enemy_hp * 1.05)
-                            print(f"FlyingEnemy HP increased to: {enemy_spawner.last_flying_enemy_hp}")
-                    
-                    bullets_to_remove.append(i)
-                    break
-        
-        for i in sorted(bullets_to_remove, reverse=True):
-            if i < len(self.bullets):
-                self.bullets.pop(i)
+            if enemy.take_damage(float(bullets.data[B_DAMAGE, i])):
+                score[0] += enemy.score_value
                 
-        for j in sorted(enemies_to_remove, reverse=True):
-            if j < len(enemies):
-                enemies.pop(j)
+                if isinstance(enemy, GroundEnemy):
+                    enemy_spawner.last_ground_enemy_hp = int(enemy_spawner.last_ground_enemy_hp * 1.05)
+                    print(f"GroundEnemy HP increased to: {enemy_spawner.last_ground_enemy_hp}")
+                elif isinstance(enemy, FlyingEnemy):
+                    enemy_spawner.last_flying_enemy_hp = int(enemy_spawner.last_flying_enemy_hp * 1.05)
+                    print(f"FlyingEnemy HP increased to: {enemy_spawner.last_flying_enemy_hp}")
+            
+            alive[i] = False
+            
+        struck = near & ~alive
+        if struck.any():
+            effect_manager.add_effect(
+                (left + width // 2)[struck],
+                (top + height // 2)[struck],
+                'bullet_impact',
+                count=np.where(bullets.data[B_TYPE, :bullets.count][struck] == 1, 10, 15)
+            )
+            
+        bullets.compact(alive)
     
     def draw_weapons(self, camera_x, camera_y, facing_right):
         if self.back_weapon:
@@ -2050,19 +2773,75 @@ class Mouseusing:
         if self.front_weapon:
             self.front_weapon.draw(camera_x, camera_y, facing_right)
     
-    def draw_bullets(self, camera_x, camera_y):
-        for bullet in self.bullets:
-            bullet.draw(camera_x, camera_y)
+    def store_previous_positions(self):
+        self.bullets.store_previous_positions()
+    
+    def draw_bullets(self, camera_x, camera_y, alpha=1.0):
+        self.bullets.draw(camera_x, camera_y, alpha)
 
-class MenuManager:
+overlay_cache = {}
+
+def shade_overlay(alpha):
+    if alpha not in overlay_cache:
+        overlay = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT), pygame.SRCALPHA)
+        overlay.fill((0, 0, 0, alpha))
+        overlay_cache[alpha] = overlay
+    return overlay_cache[alpha]
+
+highlight_cache = {}
+
+def draw_highlight(screen, rect):
+    if rect.size not in highlight_cache:
+        highlight = pygame.Surface(rect.size, pygame.SRCALPHA)
+        highlight.fill((255, 255, 255, 50))
+        highlight_cache[rect.size] = highlight
+    screen.blit(highlight_cache[rect.size], rect)
+
+class StaticScreen:
     def __init__(self):
-        try:
-            self.menu_sheet = pygame.image.load("images/menu.png").convert_alpha()
-        except:
-            print("Ошибка загрузки images/menu.png")
-            self.menu_sheet = None
-            return
+        self.key = None
+        self.base = None
+        self.captured = False
+        self.hovered = {}
+        
+    def invalidate(self):
+        self.key = None
+        
+    def reset(self):
+        self.key = None
+        self.captured = False
+        self.hovered = {}
+        
+    def capture(self, screen, key):
+        self.key = key
+        self.captured = True
+        if self.base is None or self.base.get_size() != screen.get_size():
+            self.base = screen.copy()
+        else:
+            self.base.blit(screen, (0, 0))
             
+    def update(self, screen, rects, mouse_pos):
+        dirty = []
+        for rect in rects:
+            hovered = bool(rect.collidepoint(mouse_pos))
+            if hovered == self.hovered.get(tuple(rect), False):
+                continue
+            self.hovered[tuple(rect)] = hovered
+            
+            if not hovered and self.captured:
+                screen.blit(self.base, rect, rect)
+            if hovered:
+                draw_highlight(screen, rect)
+            dirty.append(rect)
+        return dirty
+
+static_screen = StaticScreen()
+
+def blit_premultiplied(target, surface, pos):
+    target.blit(surface.copy().premul_alpha(), pos, special_flags=pygame.BLEND_PREMULTIPLIED)
+
+class MenuManager:
+    def __init__(self):
         self.sheet_width = 7760
         self.sheet_height = 1080
         self.frame_width = 1920
@@ -2070,22 +2849,20 @@ class MenuManager:
         self.total_frames = 4
         self.screen_shake = 0
         self.shake_intensity = 0
-        
-        self.frames = []
-        for i in range(self.total_frames):
-            frame_rect = pygame.Rect(i * self.frame_width, 0, self.frame_width, self.frame_height)
-            frame = self.menu_sheet.subsurface(frame_rect)
-            self.frames.append(frame)
-            
+        self.shake_rng = random.Random()
         self.menu_open = False
         
+        self.left_halves = {}
+        self.right_halves = {}
+        self.compositions = {}
+        self.loaded = False
+        
         self.weapon1_button_rect = pygame.Rect(SCREEN_WIDTH//2 - 300, SCREEN_HEIGHT//2 + 100, 200, 80)
         self.weapon2_button_rect = pygame.Rect(SCREEN_WIDTH//2 + 100, SCREEN_HEIGHT//2 + 100, 200, 80)
         self.close_button_rect = pygame.Rect(SCREEN_WIDTH - 220, 50, 170, 60)
         
-        self.font_large = pygame.font.Font(None, 48)
-        self.font_medium = pygame.font.Font(None, 36)
-        self.font_small = pygame.font.Font(None, 24)
+        self.font_medium = text_cache.font(36)
+        self.font_small = text_cache.font(24)
         
         self.weapon_descriptions = {
             1: {
@@ -2109,44 +2886,75 @@ class MenuManager:
         self.death_menu_button = pygame.Rect(SCREEN_WIDTH//2 - 150, SCREEN_HEIGHT//2 + 150, 300, 80)
         self.death_quit_button = pygame.Rect(SCREEN_WIDTH//2 - 150, SCREEN_HEIGHT//2 + 250, 300, 80)
 
+    def load(self):
+        self.loaded = True
+        
+        half_width = self.frame_width // 2
+        try:
+            halves = decoded_cache.load(MENU_SHEET, menu_half_rects())
+        except:
+            print("Ошибка загрузки images/menu.png")
+            return
+            
+        self.left_halves[1] = (halves[0][0].premul_alpha(), halves[0][1])
+        self.left_halves[2] = (halves[2][0].premul_alpha(), halves[2][1])
+        self.right_halves[1] = (halves[1][0].premul_alpha(), halves[1][1].move(half_width, 0))
+        self.right_halves[2] = (halves[3][0].premul_alpha(), halves[3][1].move(half_width, 0))
+        self.compositions.clear()
+
+    def compose(self, leftweapon, rightweapon):
+        layer = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT), pygame.SRCALPHA)
+        layer.fill((0, 0, 0, 150))
+        
+        left_half, left_bounds = self.left_halves[leftweapon]
+        right_half, right_bounds = self.right_halves[rightweapon]
+        layer.blit(left_half, left_bounds, special_flags=pygame.BLEND_PREMULTIPLIED)
+        layer.blit(right_half, right_bounds, special_flags=pygame.BLEND_PREMULTIPLIED)
+        
+        self.draw_button(layer, self.weapon1_button_rect, "Сменить LMB")
+        self.draw_button(layer, self.weapon2_button_rect, "Сменить RMB")
+        
+        self.draw_button(layer, self.close_button_rect, "Закрыть (I)", True)
+        
+        self.draw_weapon_info(layer, leftweapon,
+                              self.weapon1_button_rect.centerx,
+                              self.weapon1_button_rect.top)
+        self.draw_weapon_info(layer, rightweapon,
+                              self.weapon2_button_rect.centerx,
+                              self.weapon2_button_rect.top)
+        
+        blit_premultiplied(layer, self.font_medium.render("ESC - Выйти из игры", True, WHITE), (20, SCREEN_HEIGHT - 120))
+        blit_premultiplied(layer, self.font_medium.render("R - Перезапустить уровень", True, WHITE), (20, SCREEN_HEIGHT - 80))
+        blit_premultiplied(layer, self.font_medium.render("I - Закрыть меню", True, WHITE), (20, SCREEN_HEIGHT - 40))
+        return layer
+
     def draw_death_screen(self, screen, score):
-        overlay = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT), pygame.SRCALPHA)
-        overlay.fill((0, 0, 0, 200))
-        screen.blit(overlay, (0, 0))
+        screen.blit(shade_overlay(200), (0, 0))
         
         container_rect = pygame.Rect(SCREEN_WIDTH//2 - 400, SCREEN_HEIGHT//2 - 300, 800, 600)
         pygame.draw.rect(screen, (40, 40, 40), container_rect)
         pygame.draw.rect(screen, WHITE, container_rect, 4)
         
-        title_font = pygame.font.Font(None, 72)
-        title_text = title_font.render("ВЫ ПОГИБЛИ", True, RED)
+        title_text = text_cache.render("ВЫ ПОГИБЛИ", 72, RED)
         screen.blit(title_text, (SCREEN_WIDTH//2 - title_text.get_width()//2, SCREEN_HEIGHT//2 - 250))
         
-        stats_font = pygame.font.Font(None, 48)
-        score_text = stats_font.render(f"Счёт: {score[0]}", True, WHITE)
+        score_text = text_cache.render(f"Счёт: {score[0]}", 48, WHITE)
         screen.blit(score_text, (SCREEN_WIDTH//2 - score_text.get_width()//2, SCREEN_HEIGHT//2 - 150))
         
         self.draw_death_button(screen, self.death_restart_button, "Попробовать снова", GREEN)
         self.draw_death_button(screen, self.death_menu_button, "Вернуться в меню", BLUE)
         self.draw_death_button(screen, self.death_quit_button, "Выйти из игры", RED)
         
-        hint_font = pygame.font.Font(None, 36)
-        hint_text = hint_font.render("R - Быстрый рестарт", True, YELLOW)
+        hint_text = text_cache.render("R - Быстрый рестарт", 36, YELLOW)
         screen.blit(hint_text, (SCREEN_WIDTH//2 - hint_text.get_width()//2, SCREEN_HEIGHT//2 + 350))
     
     def draw_death_button(self, screen, rect, text, color):
         pygame.draw.rect(screen, color, rect)
         pygame.draw.rect(screen, WHITE, rect, 3)
         
-        text_surf = self.font_large.render(text, True, WHITE)
+        text_surf = text_cache.render(text, 48, WHITE)
         text_rect = text_surf.get_rect(center=rect.center)
         screen.blit(text_surf, text_rect)
-        
-        mouse_pos = pygame.mouse.get_pos()
-        if rect.collidepoint(mouse_pos):
-            highlight = pygame.Surface(rect.size, pygame.SRCALPHA)
-            highlight.fill((255, 255, 255, 50))
-            screen.blit(highlight, rect)
 
     def handle_death_screen_events(self, event, player, weapon_system, enemy_spawner, score, main_menu):
         if event.type == pygame.MOUSEBUTTONDOWN and event.button == 1:
@@ -2177,6 +2985,7 @@ class MenuManager:
     
     def restart_game(self, player, weapon_system, enemy_spawner, score):
         player = Player(px, py)
+        bullet_pool.clear()
         weapon_system = Mouseusing()
         enemy_spawner = EnemySpawner()
         score[0] = 0
@@ -2196,8 +3005,8 @@ class MenuManager:
     
     def get_screen_offset(self):
         if self.screen_shake > 0:
-            offset_x = random.randint(-self.shake_intensity, self.shake_intensity)
-            offset_y = random.randint(-self.shake_intensity, self.shake_intensity)
+            offset_x = self.shake_rng.randint(-self.shake_intensity, self.shake_intensity)
+            offset_y = self.shake_rng.randint(-self.shake_intensity, self.shake_intensity)
             return offset_x, offset_y
         return 0, 0
     
@@ -2239,7 +3048,7 @@ class MenuManager:
         info_rect = pygame.Rect(x - 150, y + 120, 300, 220)
         bg_surface = pygame.Surface((300, 220), pygame.SRCALPHA)
         bg_surface.fill((80, 80, 80, 220))
-        screen.blit(bg_surface, info_rect)
+        blit_premultiplied(screen, bg_surface, info_rect)
         
         pygame.draw.rect(screen, WHITE, info_rect, 2)
         
@@ -2250,12 +3059,12 @@ class MenuManager:
         spread_text = self.font_small.render(desc["spread"], True, WHITE)
         desc_text = self.font_small.render(desc["description"], True, WHITE)
         
-        screen.blit(name_text, (x - name_text.get_width()//2, y + 140))
-        screen.blit(damage_text, (x - 140, y + 180))
-        screen.blit(bullets_text, (x - 140, y + 200))
-        screen.blit(speed_text, (x - 140, y + 220))
-        screen.blit(spread_text, (x - 140, y + 240))
-        screen.blit(desc_text, (x - 140, y + 270))
+        blit_premultiplied(screen, name_text, (x - name_text.get_width()//2, y + 140))
+        blit_premultiplied(screen, damage_text, (x - 140, y + 180))
+        blit_premultiplied(screen, bullets_text, (x - 140, y + 200))
+        blit_premultiplied(screen, speed_text, (x - 140, y + 220))
+        blit_premultiplied(screen, spread_text, (x - 140, y + 240))
+        blit_premultiplied(screen, desc_text, (x - 140, y + 270))
     
     def draw_button(self, screen, rect, text, is_close_button=False):
         button_color = (120, 120, 120) if not is_close_button else (180, 60, 60)
@@ -2265,7 +3074,7 @@ class MenuManager:
         if is_close_button:
             text_surf = self.font_medium.render(text, True, WHITE)
             text_rect = text_surf.get_rect(center=rect.center)
-            screen.blit(text_surf, text_rect)
+            blit_premultiplied(screen, text_surf, text_rect)
         else:
             arrow_points = [
                 (rect.centerx, rect.top + 20),
@@ -2276,51 +3085,22 @@ class MenuManager:
             
             text_surf = self.font_small.render(text, True, WHITE)
             text_rect = text_surf.get_rect(center=(rect.centerx, rect.bottom - 20))
-            screen.blit(text_surf, text_rect)
+            blit_premultiplied(screen, text_surf, text_rect)
     
     def draw(self, screen, weapon_system):
-        if not self.menu_open or not self.menu_sheet:
+        if not self.menu_open:
             return
-        
-        overlay = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT), pygame.SRCALPHA)
-        overlay.fill((0, 0, 0, 150))
-        screen.blit(overlay, (0, 0))
-        
-        if weapon_system.leftweapon == 1:
-            left_half = self.frames[0].subsurface(pygame.Rect(0, 0, self.frame_width//2, self.frame_height))
-        else:
-            left_half = self.frames[2].subsurface(pygame.Rect(0, 0, self.frame_width//2, self.frame_height))
             
-        if weapon_system.rightweapon == 1:
-            right_half = self.frames[1].subsurface(pygame.Rect(self.frame_width//2, 0, self.frame_width//2, self.frame_height))
-        else:
-            right_half = self.frames[3].subsurface(pygame.Rect(self.frame_width//2, 0, self.frame_width//2, self.frame_height))
-        
-        full_menu = pygame.Surface((self.frame_width, self.frame_height), pygame.SRCALPHA)
-        full_menu.blit(left_half, (0, 0))
-        full_menu.blit(right_half, (self.frame_width//2, 0))
-        
-        screen.blit(full_menu, (0, 0))
-        
-        self.draw_button(screen, self.weapon1_button_rect, "Сменить LMB")
-        self.draw_button(screen, self.weapon2_button_rect, "Сменить RMB")
-        
-        self.draw_button(screen, self.close_button_rect, "Закрыть (I)", True)
-        
-        self.draw_weapon_info(screen, weapon_system.leftweapon, 
-                            self.weapon1_button_rect.centerx, 
-                            self.weapon1_button_rect.top)
-        self.draw_weapon_info(screen, weapon_system.rightweapon,
-                            self.weapon2_button_rect.centerx,
-                            self.weapon2_button_rect.top)
-        
-        esc_text = self.font_medium.render("ESC - Выйти из игры", True, WHITE)
-        r_text = self.font_medium.render("R - Перезапустить уровень", True, WHITE)
-        close_text = self.font_medium.render("I - Закрыть меню", True, WHITE)
+        if not self.loaded:
+            self.load()
+            
+        if not self.left_halves:
+            return
         
-        screen.blit(esc_text, (20, SCREEN_HEIGHT - 120))
-        screen.blit(r_text, (20, SCREEN_HEIGHT - 80))
-        screen.blit(close_text, (20, SCREEN_HEIGHT - 40))
+        key = (1 if weapon_system.leftweapon == 1 else 2, 1 if weapon_system.rightweapon == 1 else 2)
+        if key not in self.compositions:
+            self.compositions[key] = self.compose(*key)
+        screen.blit(self.compositions[key], (0, 0), special_flags=pygame.BLEND_PREMULTIPLIED)
 
 class MainMenu:
     def __init__(self):
@@ -2329,8 +3109,6 @@ class MainMenu:
             'start': pygame.Rect(SCREEN_WIDTH//2 - 150, SCREEN_HEIGHT//2 - 50, 300, 80),
             'quit': pygame.Rect(SCREEN_WIDTH//2 - 150, SCREEN_HEIGHT//2 + 100, 300, 80)
         }
-        self.font_large = pygame.font.Font(None, 72)
-        self.font_medium = pygame.font.Font(None, 48)
         
     def handle_event(self, event, player, weapon_system, enemy_spawner, score):
         if event.type == pygame.MOUSEBUTTONDOWN and event.button == 1:
@@ -2354,55 +3132,220 @@ class MainMenu:
         return False
     
     def draw(self, screen):
-        overlay = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT), pygame.SRCALPHA)
-        overlay.fill((0, 0, 0, 200))
-        screen.blit(overlay, (0, 0))
+        screen.blit(shade_overlay(200), (0, 0))
         
-        title_text = self.font_large.render("КУБАНОИД", True, WHITE)
+        title_text = text_cache.render("КУБАНОИД", 72, WHITE)
         screen.blit(title_text, (SCREEN_WIDTH//2 - title_text.get_width()//2, SCREEN_HEIGHT//4))
         
         self.draw_button(screen, self.buttons['start'], "НАЧАТЬ ИГРУ", GREEN)
         self.draw_button(screen, self.buttons['quit'], "ВЫЙТИ", RED)
         
-        hint_font = pygame.font.Font(None, 36)
-        hint_text = hint_font.render("ENTER - Начать игру, ESC - Выйти", True, YELLOW)
+        hint_text = text_cache.render("ENTER - Начать игру, ESC - Выйти", 36, YELLOW)
         screen.blit(hint_text, (SCREEN_WIDTH//2 - hint_text.get_width()//2, SCREEN_HEIGHT - 100))
     
     def draw_button(self, screen, rect, text, color):
         pygame.draw.rect(screen, color, rect)
         pygame.draw.rect(screen, WHITE, rect, 3)
         
-        text_surf = self.font_medium.render(text, True, WHITE)
+        text_surf = text_cache.render(text, 48, WHITE)
         text_rect = text_surf.get_rect(center=rect.center)
         screen.blit(text_surf, text_rect)
+
+class LoadingScreen:
+    def __init__(self):
+        self.bar_rect = pygame.Rect(SCREEN_WIDTH//2 - 300, SCREEN_HEIGHT//2 + 40, 600, 30)
+        
+    def draw(self, screen, progress):
+        screen.fill(BG_COLOR)
+        
+        title_text = text_cache.render("КУБАНОИД", 72, WHITE)
+        screen.blit(title_text, (SCREEN_WIDTH//2 - title_text.get_width()//2, SCREEN_HEIGHT//4))
+        
+        fill_rect = self.bar_rect.copy()
+        fill_rect.width = int(self.bar_rect.width * max(0.0, min(1.0, progress)))
+        pygame.draw.rect(screen, GREEN, fill_rect)
+        pygame.draw.rect(screen, WHITE, self.bar_rect, 3)
         
-        mouse_pos = pygame.mouse.get_pos()
-        if rect.collidepoint(mouse_pos):
-            highlight = pygame.Surface(rect.size, pygame.SRCALPHA)
-            highlight.fill((255, 255, 255, 50))
-            screen.blit(highlight, rect)
+        text = font.render(f"Загрузка... {int(progress * 100)}%", True, WHITE)
+        screen.blit(text, (SCREEN_WIDTH//2 - text.get_width()//2, self.bar_rect.y - 50))
+
+class HeldKeys(dict):
+    def __getitem__(self, key):
+        return self.get(key, False)
+
+class SyntheticInput:
+    def __init__(self, seed):
+        self.rng = random.Random(seed)
+        self.keys = HeldKeys()
+        self.direction = 0
+        self.hold = 0
+        self.angle = 0.0
+        
+    def update(self, player, enemies):
+        if self.hold <= 0:
+            self.direction = self.rng.choice((-1, 0, 1, 1))
+            self.hold = self.rng.randint(30, 120)
+        self.hold -= 1
+        
+        self.keys[pygame.K_a] = self.direction < 0
+        self.keys[pygame.K_d] = self.direction > 0
+        self.keys[pygame.K_LSHIFT] = self.rng.random() < 0.1
+        if enemies:
+            target = min(enemies, key=lambda e: (e.rect.centerx - player.rect.centerx) ** 2 + (e.rect.centery - player.rect.centery) ** 2)
+            self.angle = math.atan2(target.rect.centery - player.rect.centery, target.rect.centerx - player.rect.centerx)
+        self.angle = normalize_angle(self.angle + self.rng.uniform(-0.2, 0.2))
+        
+        actions = []
+        if self.rng.random() < 1 / 40:
+            actions.append(ACTION_JUMP)
+        if self.rng.random() < 1 / 10:
+            actions.append(ACTION_LEFT_CLICK)
+        if self.rng.random() < 1 / 15:
+            actions.append(ACTION_RIGHT_CLICK)
+        if self.rng.random() < 1 / 200:
+            actions.append(ACTION_DASH)
+        return self.keys, actions
+
+REPLAY_MAGIC = b"KUBR"
+REPLAY_VERSION = 3
+REPLAY_HEADER = struct.Struct("<4sIqdddI")
+REPLAY_TICK = struct.Struct("<BBhhd")
+REPLAY_ACTION = struct.Struct("<BB")
+REPLAY_CHECKSUM = struct.Struct("<I")
+REPLAY_CHECK_INTERVAL = 60
+
+KEY_LEFT, KEY_RIGHT, KEY_BOOST, TICK_ACTIVE, TICK_CHECKSUM = 1, 2, 4, 8, 16
+ACTION_JUMP, ACTION_LEFT_CLICK, ACTION_RIGHT_CLICK, ACTION_DASH, ACTION_LOADOUT, ACTION_RESTART = range(1, 7)
+
+class InputRecorder:
+    def __init__(self, path, seed, check_interval=REPLAY_CHECK_INTERVAL):
+        self.path = path
+        self.seed = seed
+        self.check_interval = check_interval
+        self.actions = []
+        self.ticks = 0
+        self.file = None
+        
+    def start(self):
+        start_recorded_session(self.seed, camera_x, camera_y, current_angle)
+        self.file = open(self.path, "wb")
+        self.file.write(REPLAY_HEADER.pack(REPLAY_MAGIC, REPLAY_VERSION, self.seed,
+                                           camera_x, camera_y, current_angle, self.check_interval))
+        print(f"Запись ввода в {self.path} (seed {self.seed})")
+        
+    def action(self, code, arg=0):
+        self.actions.append((code, arg))
+        
+    def record(self, keys, mouse_x, mouse_y, active):
+        flags = ((KEY_LEFT if keys[pygame.K_a] else 0) |
+                 (KEY_RIGHT if keys[pygame.K_d] else 0) |
+                 (KEY_BOOST if keys[pygame.K_LSHIFT] else 0) |
+                 (TICK_ACTIVE if active else 0))
+        self.ticks += 1
+        check = self.ticks % self.check_interval == 0
+        if check:
+            flags |= TICK_CHECKSUM
+            
+        self.file.write(REPLAY_TICK.pack(flags, len(self.actions), mouse_x, mouse_y, current_angle))
+        for code, arg in self.actions:
+            self.file.write(REPLAY_ACTION.pack(code, arg))
+        if check:
+            self.file.write(REPLAY_CHECKSUM.pack(world_checksum()))
+        self.actions.clear()
+        
+    def close(self):
+        if self.file:
+            self.file.close()
+            self.file = None
+            print(f"Записано тиков: {self.ticks}")
+
+class InputReplay:
+    def __init__(self, path):
+        with open(path, "rb") as f:
+            self.data = f.read()
+        magic, version, self.seed, self.camera_x, self.camera_y, self.angle, self.check_interval = \
+            REPLAY_HEADER.unpack_from(self.data, 0)
+        if magic != REPLAY_MAGIC or version != REPLAY_VERSION:
+            raise ValueError(f"Неверный формат записи: {path}")
+        self.offset = REPLAY_HEADER.size
+        self.keys = HeldKeys()
+        self.ticks = 0
+        self.checks = 0
+        self.mismatches = 0
+        
+    def start(self):
+        global player, weapon_system, enemy_spawner
+        
+        player, weapon_system, enemy_spawner = menu_manager.restart_game(player, weapon_system, enemy_spawner, score)
+        start_recorded_session(self.seed, self.camera_x, self.camera_y, self.angle)
+        main_menu.active = False
+        menu_manager.menu_open = False
+        
+    def step(self):
+        global current_angle, mouse_x, mouse_y
+        
+        if self.offset >= len(self.data):
+            return False
+            
+        flags, action_count, mouse_x, mouse_y, angle = REPLAY_TICK.unpack_from(self.data, self.offset)
+        self.offset += REPLAY_TICK.size
+        for _ in range(action_count):
+            apply_action(*REPLAY_ACTION.unpack_from(self.data, self.offset))
+            self.offset += REPLAY_ACTION.size
+            
+        self.keys[pygame.K_a] = bool(flags & KEY_LEFT)
+        self.keys[pygame.K_d] = bool(flags & KEY_RIGHT)
+        self.keys[pygame.K_LSHIFT] = bool(flags & KEY_BOOST)
+        current_angle = angle
+        simulate_step(self.keys, bool(flags & TICK_ACTIVE))
+        self.ticks += 1
+        
+        if flags & TICK_CHECKSUM:
+            expected, = REPLAY_CHECKSUM.unpack_from(self.data, self.offset)
+            self.offset += REPLAY_CHECKSUM.size
+            self.checks += 1
+            if world_checksum() != expected:
+                if not self.mismatches:
+                    print(f"Расхождение состояния на тике {self.ticks}")
+                self.mismatches += 1
+        return True
+    
+    def report(self):
+        print(f"Воспроизведено тиков: {self.ticks}, проверок: {self.checks}, расхождений: {self.mismatches}")
 
-menu_manager = MenuManager()
-main_menu = MainMenu()
+sound_manager = SoundManager()
+texture_manager = None
+effect_manager = None
+bullet_pool = None
+bullet_sprites = None
+menu_manager = None
+main_menu = None
+interface_manager = None
 
+platform_grid = None
 platforms = []
 px, py = 0, 0
-for ri, row in enumerate(level_map):
-    for ci, c in enumerate(row):
-        if c == "*":
-            platforms.append(pygame.Rect(ci * BLOCK_SIZE, ri * BLOCK_SIZE, BLOCK_SIZE, BLOCK_SIZE))
-        elif c == "$":
-            px, py = ci * BLOCK_SIZE, ri * BLOCK_SIZE
-
-player = Player(px, py)
-weapon_system = Mouseusing()
-enemy_spawner = EnemySpawner()
-interface_manager = InterfaceManager()
+
+player = None
+weapon_system = None
+enemy_spawner = None
 running = True
 camera_x, camera_y = 0, 0
+shake_offset_x, shake_offset_y = 0, 0
 current_angle = 0.0
 smoothness = 0.1
 score = [0]
+mouse_x, mouse_y = 0, 0
+input_recorder = None
+window_focused = True
+window_minimized = False
+
+def store_previous_position(obj, x, y):
+    obj.prev_pos = (x, y)
+
+def interpolation_offset(obj, x, y, alpha):
+    prev_x, prev_y = getattr(obj, 'prev_pos', (x, y))
+    return (x - prev_x) * (1.0 - alpha), (y - prev_y) * (1.0 - alpha)
 
 def normalize_angle(angle):
     while angle > math.pi:
@@ -2411,9 +3354,99 @@ def normalize_angle(angle):
         angle += 2 * math.pi
     return angle
 
-weapon_system.create_weapons(player.rect.centerx, player.rect.centery)
+def load_level(level_rows):
+    global platform_grid, platforms, px, py
+    
+    platform_grid = PlatformGrid(level_rows)
+    platforms = platform_grid.platforms
+    px, py = 0, 0
+    for ri, row in enumerate(level_rows):
+        for ci, c in enumerate(row):
+            if c == "$":
+                px, py = ci * BLOCK_SIZE, ri * BLOCK_SIZE
 
-texture_manager.assign_textures()
+def init_display():
+    global screen, clock, font
+    
+    pygame.init()
+    startup_profiler.mark("pygame.init")
+    
+    screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
+    pygame.display.set_caption("Кубаноид")
+    clock = pygame.time.Clock()
+    font = text_cache.font(36)
+    startup_profiler.mark("окно и шрифт")
+
+def init_level():
+    global texture_manager
+    
+    load_level(level_map)
+    texture_manager = PlatformTextureManager()
+    startup_profiler.mark("уровень и тайлы")
+
+def init_sprites():
+    global effect_manager, bullet_pool, bullet_sprites
+    
+    effect_manager = EffectManager()
+    bullet_pool = BulletPool()
+    bullet_sprites = BulletSpriteCache()
+    assets.preload_sprites()
+    startup_profiler.mark("спрайты")
+
+def init_menus():
+    global menu_manager, main_menu, interface_manager
+    
+    menu_manager = MenuManager()
+    main_menu = MainMenu()
+    interface_manager = InterfaceManager()
+    startup_profiler.mark("меню и интерфейс")
+
+def init_world():
+    global player, weapon_system, enemy_spawner
+    
+    player = Player(px, py)
+    weapon_system = Mouseusing()
+    enemy_spawner = EnemySpawner()
+    weapon_system.create_weapons(player.rect.centerx, player.rect.centery)
+    
+    texture_manager.assign_textures()
+    startup_profiler.mark("текстуры уровня")
+
+INIT_STEPS = [init_level, init_sprites, init_menus, init_world]
+
+def init_game():
+    for step in INIT_STEPS:
+        step()
+
+def run_loading_screen():
+    global running
+    
+    loader = AssetLoader()
+    loader.start()
+    loading_screen = LoadingScreen()
+    steps = list(INIT_STEPS)
+    total = loader.total + len(steps)
+    first_frame = True
+    
+    while steps:
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT:
+                loader.stop()
+                running = False
+                return False
+                
+        loader.poll()
+        if loader.finished:
+            steps.pop(0)()
+            
+        loading_screen.draw(screen, (loader.completed + len(INIT_STEPS) - len(steps)) / total)
+        pygame.display.flip()
+        if first_frame:
+            startup_profiler.mark("первый кадр загрузки")
+            first_frame = False
+        clock.tick(FPS)
+        
+    return True
 
 def draw_all(camera_x, camera_y, score):
     global current_angle, mouse_x, mouse_y
@@ -2471,14 +3504,14 @@ def draw_all(camera_x, camera_y, score):
         pygame.draw.circle(screen, BLACK, (int(white_circle_x), int(white_circle_y)), 20)
         
 def draw_interface(score, weapon_system):
-    score_text = font.render(f"Очки: {score[0]}", True, WHITE)
+    score_text = text_cache.render(f"Очки: {score[0]}", 36, WHITE)
     screen.blit(score_text, (20, 20))
     
     if not player.alive:
         pygame.mouse.set_visible(True)
         menu_manager.draw_death_screen(screen, score)
 
-def draw_crosshair(camera_x, camera_y, mouse_x, mouse_y):
+def update_aim(camera_x, camera_y, mouse_x, mouse_y):
     global current_angle
     
     player_screen_x = player.rect.centerx - camera_x
@@ -2507,136 +3540,472 @@ def draw_crosshair(camera_x, camera_y, mouse_x, mouse_y):
 
     current_angle += angle_diff * smoothness * player.time_scale
     current_angle = normalize_angle(current_angle)
-    
-    white_circle_x = green_circle_center[0] + 350 * math.cos(current_angle)
-    white_circle_y = green_circle_center[1] + 350 * math.sin(current_angle)
-    
-    black_circle_world_x = white_circle_x + camera_x
-    player.update_facing_direction(black_circle_world_x)
-    
-    pygame.draw.circle(screen, BLACK, (int(white_circle_x), int(white_circle_y)), 20)
 
-while running:
-    dt = clock.tick(FPS) / 16.6
-    keys = pygame.key.get_pressed()
-    mouse_x, mouse_y = pygame.mouse.get_pos()
+def simulate_step(keys, active):
+    global camera_x, camera_y, shake_offset_x, shake_offset_y
     
     menu_manager.update_screen_shake()
     shake_offset_x, shake_offset_y = menu_manager.get_screen_offset()
     
-    sound_manager.update_music()
+    store_previous_position(player, player.rect.x, player.rect.y)
+    enemy_spawner.store_previous_positions()
+    weapon_system.store_previous_positions()
     
-    for event in pygame.event.get():
-        if event.type == pygame.QUIT:
-            running = False
-            continue
-        
-        if main_menu.active:
-            result = main_menu.handle_event(event, player, weapon_system, enemy_spawner, score)
-            if result == "quit":
+    if active:
+        black_circle_world_x = player.rect.centerx + 350 * math.cos(current_angle)
+        player.update_facing_direction(black_circle_world_x)
+        player.move(keys, 1.0)
+        player.update_animation(1.0)
+        frame_profiler.lap('player')
+    
+        weapon_system.update_weapons_position(player.rect.centerx, player.rect.centery, current_angle, player.facing_right)
+        weapon_system.update_bullets(camera_x, camera_y, enemy_spawner.grid, score)
+        weapon_system.update_cooldown()
+        frame_profiler.lap('bullets')
+    
+        enemy_spawner.update(player)
+        frame_profiler.lap('enemies')
+    
+        target_camera_x = player.rect.centerx - SCREEN_WIDTH // 2
+        target_camera_y = player.rect.centery - SCREEN_HEIGHT // 2
+    
+        camera_x += ((target_camera_x + shake_offset_x) - camera_x) * 0.1 * player.time_scale
+        camera_y += ((target_camera_y + shake_offset_y) - camera_y) * 0.1 * player.time_scale
+
+    effect_manager.update()
+    frame_profiler.lap('effects')
+
+def apply_action(code, arg):
+    global player, weapon_system, enemy_spawner
+    
+    if code == ACTION_JUMP:
+        player.jump()
+    elif code == ACTION_LEFT_CLICK:
+        weapon_system.left_click(player.rect.centerx, player.rect.centery, current_angle)
+    elif code == ACTION_RIGHT_CLICK:
+        weapon_system.right_click(player.rect.centerx, player.rect.centery, current_angle)
+    elif code == ACTION_DASH:
+        player.start_dash(current_angle)
+    elif code == ACTION_LOADOUT:
+        weapon_system.leftweapon, weapon_system.rightweapon = arg >> 4, arg & 15
+        if weapon_system.front_weapon:
+            weapon_system.front_weapon.update_weapon_type(weapon_system.leftweapon, True)
+        if weapon_system.back_weapon:
+            weapon_system.back_weapon.update_weapon_type(weapon_system.rightweapon, False)
+        weapon_system.create_weapons(player.rect.centerx, player.rect.centery)
+    elif code == ACTION_RESTART:
+        player, weapon_system, enemy_spawner = menu_manager.restart_game(player, weapon_system, enemy_spawner, score)
+
+def record_action(code, arg=0):
+    if input_recorder:
+        input_recorder.action(code, arg)
+
+def loadout_arg():
+    return weapon_system.leftweapon << 4 | weapon_system.rightweapon
+
+def world_checksum():
+    state = (
+        tuple(player.rect), player.vx, player.vy, player.alive, player.health, score[0],
+        [(tuple(e.rect), e.health) for e in enemy_spawner.ground_enemies],
+        [(tuple(e.rect), e.health) for e in enemy_spawner.flying_enemies],
+        bullet_pool.data[B_X:B_Y + 1, :bullet_pool.count].tolist(),
+        effect_manager.count, float(camera_x), float(camera_y), float(current_angle)
+    )
+    return zlib.crc32(repr(state).encode())
+
+def start_recorded_session(seed, start_camera_x, start_camera_y, start_angle):
+    global camera_x, camera_y, current_angle, shake_offset_x, shake_offset_y
+    
+    random.seed(seed)
+    effect_manager.seed(seed)
+    effect_manager.clear()
+    bullet_pool.seed(seed)
+    bullet_pool.clear()
+    menu_manager.shake_rng.seed(seed)
+    menu_manager.screen_shake = 0
+    camera_x, camera_y, current_angle = start_camera_x, start_camera_y, start_angle
+    shake_offset_x = shake_offset_y = 0
+
+def draw_crosshair(player_screen_x, player_screen_y):
+    white_circle_x = player_screen_x + 350 * math.cos(current_angle)
+    white_circle_y = player_screen_y + 350 * math.sin(current_angle)
+    
+    pygame.draw.circle(screen, BLACK, (int(white_circle_x), int(white_circle_y)), 20)
+
+def run_game(render_fps=FPS, replay=None):
+    global player, weapon_system, enemy_spawner, running, mouse_x, mouse_y
+    
+    accumulator = 0.0
+    prev_camera_x, prev_camera_y = camera_x, camera_y
+    
+    while running:
+        frame_profiler.begin_frame()
+        events = []
+        wait_ms = idle_timeout() if replay is None else 0
+        if wait_ms:
+            event = pygame.event.wait(wait_ms)
+            if event.type != pygame.NOEVENT:
+                events.append(event)
+        accumulator += min(clock.tick(render_fps) / 1000.0, SIM_STEP * MAX_SIM_STEPS)
+        frame_profiler.lap('idle')
+        
+        keys = pygame.key.get_pressed()
+        mouse_x, mouse_y = pygame.mouse.get_pos()
+    
+        sound_manager.update_music()
+        
+        events.extend(pygame.event.get())
+        for event in events:
+            if event.type != pygame.MOUSEMOTION:
+                static_screen.invalidate()
+                
+            if event.type == pygame.QUIT:
                 running = False
-            elif result:
-                player, weapon_system, enemy_spawner = result
                 continue
-        
-        elif not player.alive:
-            result = menu_manager.handle_death_screen_events(event, player, weapon_system, enemy_spawner, score, main_menu)
-            if result == "quit":
-                running = False
-            elif result == "main_menu":
+            
+            if event.type in WINDOW_STATE_EVENTS:
+                update_window_state(event, replay is None)
                 continue
-            elif result:
-                if result[0]:
-                    player, weapon_system, enemy_spawner = result
-            continue
-        
-        elif menu_manager.menu_open:
-            if menu_manager.handle_event(event, weapon_system):
+            
+            if event.type == pygame.KEYDOWN and event.key == pygame.K_F3:
+                frame_profiler.visible = not frame_profiler.visible
                 continue
             
-            if event.type == pygame.KEYDOWN:
-                if event.key == pygame.K_ESCAPE:
+            if replay:
+                continue
+        
+            if main_menu.active:
+                result = main_menu.handle_event(event, player, weapon_system, enemy_spawner, score)
+                if result == "quit":
                     running = False
-                elif event.key == pygame.K_i or event.key == pygame.K_ESCAPE:
-                    menu_manager.menu_open = False
-                    pygame.mouse.set_visible(False)
-                elif event.key == pygame.K_r:
-                    player, weapon_system, enemy_spawner = menu_manager.restart_game(player, weapon_system, enemy_spawner, score)
-                    menu_manager.menu_open = False
-                    pygame.mouse.set_visible(False)
-            continue
+                elif result:
+                    player, weapon_system, enemy_spawner = result
+                    record_action(ACTION_RESTART)
+                    continue
         
-        else:
-            if event.type == pygame.KEYDOWN:
-                if event.key == pygame.K_ESCAPE:
-                    pygame.mouse.set_visible(True)
-                    menu_manager.menu_open = True
-                elif event.key == pygame.K_i:
-                    menu_manager.toggle_menu()
-                elif event.key == pygame.K_F11:
-                    pygame.display.toggle_fullscreen()
-                elif event.key == pygame.K_SPACE:
-                    player.jump()
-                elif event.key == pygame.K_1:
-                    weapon_system.switch_weapon(1)
-                    weapon_system.create_weapons(player.rect.centerx, player.rect.centery)
-                elif event.key == pygame.K_2:
-                    weapon_system.switch_weapon(2)
-                    weapon_system.create_weapons(player.rect.centerx, player.rect.centery)
-                elif event.key == pygame.K_q:
-                    player.start_dash(current_angle)
-            
-            elif event.type == pygame.MOUSEBUTTONDOWN:
-                if event.button == 1:
-                    weapon_system.left_click(player.rect.centerx, player.rect.centery, current_angle)
-                elif event.button == 3:
-                    weapon_system.right_click(player.rect.centerx, player.rect.centery, current_angle)
-    
-    if not main_menu.active and player.alive and not menu_manager.menu_open:
-        player.move(keys, dt)
-        player.update_animation(dt)
+            elif not player.alive:
+                result = menu_manager.handle_death_screen_events(event, player, weapon_system, enemy_spawner, score, main_menu)
+                if result == "quit":
+                    running = False
+                elif result == "main_menu":
+                    continue
+                elif result:
+                    if result[0]:
+                        player, weapon_system, enemy_spawner = result
+                        record_action(ACTION_RESTART)
+                continue
         
-        weapon_system.update_weapons_position(player.rect.centerx, player.rect.centery, current_angle, player.facing_right)
-        weapon_system.update_bullets(camera_x, camera_y, enemy_spawner.ground_enemies + enemy_spawner.flying_enemies, score)
-        weapon_system.update_cooldown()
+            elif menu_manager.menu_open:
+                if menu_manager.handle_event(event, weapon_system):
+                    record_action(ACTION_LOADOUT, loadout_arg())
+                    continue
+            
+                if event.type == pygame.KEYDOWN:
+                    if event.key == pygame.K_ESCAPE:
+                        running = False
+                    elif event.key == pygame.K_i or event.key == pygame.K_ESCAPE:
+                        menu_manager.menu_open = False
+                        pygame.mouse.set_visible(False)
+                    elif event.key == pygame.K_r:
+                        player, weapon_system, enemy_spawner = menu_manager.restart_game(player, weapon_system, enemy_spawner, score)
+                        record_action(ACTION_RESTART)
+                        menu_manager.menu_open = False
+                        pygame.mouse.set_visible(False)
+                continue
         
-        enemy_spawner.update(player)
+            else:
+                if event.type == pygame.KEYDOWN:
+                    if event.key == pygame.K_ESCAPE:
+                        pygame.mouse.set_visible(True)
+                        menu_manager.menu_open = True
+                    elif event.key == pygame.K_i:
+                        menu_manager.toggle_menu()
+                    elif event.key == pygame.K_F11:
+                        pygame.display.toggle_fullscreen()
+                    elif event.key == pygame.K_SPACE:
+                        player.jump()
+                        record_action(ACTION_JUMP)
+                    elif event.key == pygame.K_1:
+                        weapon_system.switch_weapon(1)
+                        weapon_system.create_weapons(player.rect.centerx, player.rect.centery)
+                        record_action(ACTION_LOADOUT, loadout_arg())
+                    elif event.key == pygame.K_2:
+                        weapon_system.switch_weapon(2)
+                        weapon_system.create_weapons(player.rect.centerx, player.rect.centery)
+                        record_action(ACTION_LOADOUT, loadout_arg())
+                    elif event.key == pygame.K_q:
+                        player.start_dash(current_angle)
+                        record_action(ACTION_DASH)
+            
+                elif event.type == pygame.MOUSEBUTTONDOWN:
+                    if event.button == 1:
+                        weapon_system.left_click(player.rect.centerx, player.rect.centery, current_angle)
+                        record_action(ACTION_LEFT_CLICK)
+                    elif event.button == 3:
+                        weapon_system.right_click(player.rect.centerx, player.rect.centery, current_angle)
+                        record_action(ACTION_RIGHT_CLICK)
+    
+        frame_profiler.lap('input')
+        
+        while accumulator >= SIM_STEP:
+            accumulator -= SIM_STEP
+            prev_camera_x, prev_camera_y = camera_x, camera_y
+            
+            if replay:
+                if not replay.step():
+                    running = False
+                    break
+                continue
+            
+            active = not main_menu.active and player.alive and not menu_manager.menu_open
+            if active:
+                update_aim(camera_x - shake_offset_x, camera_y - shake_offset_y, mouse_x, mouse_y)
+            simulate_step(keys, active)
+            
+            if input_recorder:
+                input_recorder.record(keys, mouse_x, mouse_y, active)
+    
+        interface_manager.update_state(weapon_system, player)
         
-        target_camera_x = player.rect.centerx - SCREEN_WIDTH // 2
-        target_camera_y = player.rect.centery - SCREEN_HEIGHT // 2
+        alpha = accumulator / SIM_STEP
+        view_x = prev_camera_x + (camera_x - prev_camera_x) * alpha - shake_offset_x
+        view_y = prev_camera_y + (camera_y - prev_camera_y) * alpha - shake_offset_y
+        present_frame(view_x, view_y, alpha)
+        frame_profiler.end_frame()
+        
+        if not startup_profiler.reported:
+            startup_profiler.mark("первый кадр")
+            startup_profiler.report()
+
+IDLE_WAIT_MS = 250
+MINIMIZED_WAIT_MS = 1000
+WINDOW_STATE_EVENTS = (pygame.WINDOWFOCUSLOST, pygame.WINDOWFOCUSGAINED, pygame.WINDOWMINIMIZED,
+                       pygame.WINDOWRESTORED, pygame.WINDOWSHOWN, pygame.WINDOWHIDDEN)
+
+def update_window_state(event, allow_pause=True):
+    global window_focused, window_minimized
+    
+    if event.type == pygame.WINDOWFOCUSLOST:
+        window_focused = False
+    elif event.type == pygame.WINDOWFOCUSGAINED:
+        window_focused = True
+    elif event.type in (pygame.WINDOWMINIMIZED, pygame.WINDOWHIDDEN):
+        window_minimized = True
+    else:
+        window_minimized = False
+        
+    gameplay = not main_menu.active and player.alive and not menu_manager.menu_open
+    if allow_pause and gameplay and (not window_focused or window_minimized):
+        menu_manager.menu_open = True
+        pygame.mouse.set_visible(True)
+
+def idle_timeout():
+    if window_minimized:
+        return MINIMIZED_WAIT_MS
+    if not window_focused or static_screen.key is not None:
+        return IDLE_WAIT_MS
+    return 0
+
+def static_screen_key():
+    if main_menu.active:
+        return ('main',)
+    if effect_manager.count or menu_manager.screen_shake:
+        return None
+    if not player.alive:
+        return ('death', score[0], menu_manager.menu_open)
+    if menu_manager.menu_open:
+        return ('menu', weapon_system.leftweapon, weapon_system.rightweapon, score[0])
+    return None
+
+def hover_rects():
+    if main_menu.active:
+        return list(main_menu.buttons.values())
+    if not player.alive:
+        return [menu_manager.death_restart_button, menu_manager.death_menu_button, menu_manager.death_quit_button]
+    if menu_manager.menu_open and menu_manager.left_halves:
+        return [menu_manager.weapon1_button_rect, menu_manager.weapon2_button_rect, menu_manager.close_button_rect]
+    return []
+
+def present_frame(view_x, view_y, alpha=1.0):
+    key = static_screen_key()
+    if key is not None and key == static_screen.key and not frame_profiler.visible:
+        dirty = static_screen.update(screen, hover_rects(), (mouse_x, mouse_y))
+        frame_profiler.lap('hud')
+        if dirty:
+            pygame.display.update(dirty)
+        frame_profiler.lap('flip')
+        return
         
-        camera_x += ((target_camera_x + shake_offset_x) - camera_x) * 0.1 * player.time_scale
-        camera_y += ((target_camera_y + shake_offset_y) - camera_y) * 0.1 * player.time_scale
-    
-    effect_manager.update()
-    
-    interface_manager.update_state(weapon_system, player)
-    
     screen.fill(BG_COLOR)
     
     if main_menu.active:
         main_menu.draw(screen)
     
     else:
-        texture_manager.draw_platforms(camera_x - shake_offset_x, camera_y - shake_offset_y)
-        weapon_system.draw_weapons(camera_x - shake_offset_x, camera_y - shake_offset_y, player.facing_right)
-        player.draw(camera_x - shake_offset_x, camera_y - shake_offset_y)
-        weapon_system.draw_front_weapon(camera_x - shake_offset_x, camera_y - shake_offset_y, player.facing_right)
-        enemy_spawner.draw(camera_x - shake_offset_x, camera_y - shake_offset_y)
-        weapon_system.draw_bullets(camera_x - shake_offset_x, camera_y - shake_offset_y)
-        effect_manager.draw(camera_x - shake_offset_x, camera_y - shake_offset_y)
-        
+        player_offset_x, player_offset_y = interpolation_offset(player, player.rect.x, player.rect.y, alpha)
+        
+        texture_manager.draw_platforms(view_x, view_y)
+        frame_profiler.lap('platforms')
+        weapon_system.draw_weapons(view_x + player_offset_x, view_y + player_offset_y, player.facing_right)
+        player.draw(view_x, view_y, alpha)
+        weapon_system.draw_front_weapon(view_x + player_offset_x, view_y + player_offset_y, player.facing_right)
+        enemy_spawner.draw(view_x, view_y, alpha)
+        weapon_system.draw_bullets(view_x, view_y, alpha)
+        frame_profiler.lap('entities')
+        effect_manager.draw(view_x, view_y)
+        frame_profiler.lap('particles')
+        
+        if frame_profiler.active:
+            frame_profiler.counts['bullets'] = bullet_pool.count
+            frame_profiler.counts['particles'] = effect_manager.count
+            frame_profiler.counts['enemies'] = len(enemy_spawner.grid.enemies)
+            frame_profiler.counts['platforms'] = platform_grid.count_in_rect(pygame.Rect(view_x, view_y, SCREEN_WIDTH, SCREEN_HEIGHT))
+            frame_profiler.counts['chunks'] = texture_manager.chunks_drawn
+    
         if player.alive and not menu_manager.menu_open:
-            draw_crosshair(camera_x - shake_offset_x, camera_y - shake_offset_y, mouse_x, mouse_y)
-        
+            draw_crosshair(player.rect.centerx - player_offset_x - view_x, player.rect.centery - player_offset_y - view_y)
+    
         interface_manager.draw(screen)
         draw_interface(score, weapon_system)
-        
+    
         if not player.alive:
             menu_manager.draw_death_screen(screen, score)
-        
+    
         menu_manager.draw(screen, weapon_system)
+        
+    static_screen.reset()
+    if key is not None:
+        static_screen.capture(screen, key)
+    static_screen.update(screen, hover_rects(), (mouse_x, mouse_y))
+    frame_profiler.lap('hud')
     
+    if frame_profiler.visible:
+        frame_profiler.draw(screen)
+        
     pygame.display.flip()
+    frame_profiler.lap('flip')
+    
+    if not main_menu.active:
+        texture_manager.prebake(view_x, view_y)
+        frame_profiler.lap('platforms')
+
+def start_headless(seed):
+    random.seed(seed)
+    init_game()
+    effect_manager.seed(seed)
+    bullet_pool.seed(seed)
+    menu_manager.shake_rng.seed(seed)
+    main_menu.active = False
+    return SyntheticInput(seed)
+
+def headless_tick(synthetic_input):
+    global current_angle
+    
+    keys, actions = synthetic_input.update(player, enemy_spawner.grid.enemies)
+    current_angle = synthetic_input.angle
+    
+    died = not player.alive
+    if died:
+        apply_action(ACTION_RESTART, 0)
+        
+    for action in actions:
+        apply_action(action, 0)
+        
+    simulate_step(keys, True)
+    return died
+
+def draw_headless_frame():
+    interface_manager.update_state(weapon_system, player)
+    present_frame(camera_x - shake_offset_x, camera_y - shake_offset_y)
+
+def run_headless(ticks, seed, draw=True):
+    synthetic_input = start_headless(seed)
+    deaths = 0
+    
+    start = time.perf_counter()
+    tick = 0
+    while ticks is None or tick < ticks:
+        if headless_tick(synthetic_input):
+            deaths += 1
+        if draw:
+            draw_headless_frame()
+            
+        tick += 1
+        if tick % 1000 == 0:
+            pygame.event.pump()
+            
+    elapsed = time.perf_counter() - start
+    print(f"Тиков: {tick}, время: {elapsed:.2f} с, тиков/с: {tick / max(elapsed, 1e-9):.0f}, "
+          f"счёт: {score[0]}, смертей: {deaths}")
+
+def run_replay_headless(path, draw=True):
+    init_game()
+    replay = InputReplay(path)
+    replay.start()
+    
+    start = time.perf_counter()
+    while replay.step():
+        if draw:
+            draw_headless_frame()
+        if replay.ticks % 1000 == 0:
+            pygame.event.pump()
+            
+    elapsed = time.perf_counter() - start
+    replay.report()
+    print(f"Время: {elapsed:.2f} с, тиков/с: {replay.ticks / max(elapsed, 1e-9):.0f}, счёт: {score[0]}")
+    return replay.mismatches == 0
+
+def arg_value(args, name, default):
+    if name in args:
+        index = args.index(name)
+        if index + 1 < len(args):
+            return args[index + 1]
+    return default
+
+def main(argv=None):
+    global input_recorder
+    
+    args = sys.argv[1:] if argv is None else argv
+    startup_profiler.enabled = "--startup-profile" in args
+    startup_profiler.mark("импорт")
+    replay_path = arg_value(args, "--replay", None)
+    
+    if "--headless" in args:
+        os.environ["SDL_VIDEODRIVER"] = "dummy"
+        os.environ["SDL_AUDIODRIVER"] = "dummy"
+        init_display()
+        if replay_path:
+            run_replay_headless(replay_path, draw="--no-draw" not in args)
+        else:
+            ticks = int(arg_value(args, "--ticks", 0)) or None
+            run_headless(ticks, int(arg_value(args, "--seed", 1)), draw="--no-draw" not in args)
+    else:
+        init_display()
+        profile_out = arg_value(args, "--profile-out", None)
+        if profile_out:
+            frame_profiler.rows = []
+        if run_loading_screen():
+            replay = None
+            record_path = arg_value(args, "--record", None)
+            if replay_path:
+                replay = InputReplay(replay_path)
+                replay.start()
+            elif record_path:
+                seed = int(arg_value(args, "--seed", random.randrange(2 ** 31)))
+                check_interval = int(arg_value(args, "--checksum-every", REPLAY_CHECK_INTERVAL))
+                input_recorder = InputRecorder(record_path, seed, check_interval)
+                input_recorder.start()
+                
+            run_game(int(arg_value(args, "--fps", FPS)), replay)
+            
+            if replay:
+                replay.report()
+            if input_recorder:
+                input_recorder.close()
+        if profile_out:
+            frame_profiler.write_csv(profile_out)
+    
+    pygame.quit()
 
-pygame.quit()
\ No newline at end of file
+if __name__ == "__main__":
+    main()